@@ -0,0 +1,72 @@
+# ANTI-CAPITALIST SOFTWARE LICENSE (v 1.4)
+#
+# Copyright © 2026 Jonathan Tremesayques
+#
+# This is anti-capitalist software, released for free use by individuals and
+# organizations that do not operate by capitalist principles.
+#
+# Permission is hereby granted, free of charge, to any person or organization
+# (the "User") obtaining a copy of this software and associated documentation
+# files (the "Software"), to use, copy, modify, merge, distribute, and/or sell
+# copies of the Software, subject to the following conditions:
+#
+#   1. The above copyright notice and this permission notice shall be included
+#      in all copies or modified versions of the Software.
+#
+#   2. The User is one of the following:
+#     a. An individual person, laboring for themselves
+#     b. A non-profit organization
+#     c. An educational institution
+#     d. An organization that seeks shared profit for all of its members, and
+#        allows non-members to set the cost of their labor
+#
+#   3. If the User is an organization with owners, then all owners are workers
+#     and all workers are owners with equal equity and/or equal vote.
+#
+#   4. If the User is an organization, then the User is not law enforcement or
+#      military, or working for or under either.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT EXPRESS OR IMPLIED WARRANTY OF ANY
+# KIND, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF
+# CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from argparse import ArgumentParser
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Optional
+
+from shadertools.bundle import SUFFIX, save_bundle
+from shadertools.shader import load_metadata, load_weights
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = ArgumentParser(
+        description="Convert JSON or NPZ weights and their metadata file to a "
+        "single model bundle."
+    )
+    parser.add_argument(
+        "-i",
+        "--input",
+        type=Path,
+        default="nn_weights_tiny.npz",
+        help="Path to the input NPZ or JSON weights file.",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        help="Path to the output model bundle.",
+    )
+    args = parser.parse_args(argv)
+    if args.input.suffix == SUFFIX:
+        parser.error(f"{args.input} is already a model bundle")
+    output_path = args.output or args.input.with_suffix(SUFFIX)
+    if output_path.resolve() == args.input.resolve():
+        parser.error("--output must differ from --input")
+
+    weights = load_weights(args.input)
+    metadata = load_metadata(args.input)
+    save_bundle(output_path, weights, metadata)
+    print(f"Model bundle saved to: {output_path}")
@@ -46,6 +46,9 @@ def main(argv: Optional[Sequence[str]] = None) -> None:
         "-i", "--input", default="video.webm", type=Path, help="input file"
     )
     parser.add_argument("-o", "--output", type=Path, help="output file")
+    parser.add_argument(
+        "--color", action="store_true", help="extract RGB instead of grayscale"
+    )
 
     args = parser.parse_args(argv)
     input_file = args.input
@@ -53,5 +56,5 @@ def main(argv: Optional[Sequence[str]] = None) -> None:
     if output_file is None:
         output_file = input_file.parent / (input_file.stem + "_pixels.parquet")
 
-    df = extract_pixels_from_capture(input_file)
+    df = extract_pixels_from_capture(input_file, color=args.color)
     df.write_parquet(output_file)
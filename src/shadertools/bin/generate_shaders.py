@@ -37,7 +37,12 @@ from collections.abc import Sequence
 from pathlib import Path
 from typing import Optional
 
-from shadertools.shader import generate_multipass_shader
+from shadertools.cost import CostBudgetExceeded
+from shadertools.shader import (
+    QUANTIZATIONS,
+    UPSCALE_FILTERS,
+    generate_multipass_shader,
+)
 
 
 def main(argv: Optional[Sequence[str]] = None):
@@ -46,8 +51,8 @@ def main(argv: Optional[Sequence[str]] = None):
         "-i",
         "--input",
         type=Path,
-        default="nn_weights_tiny.npz",
-        help="Path to the input NPZ file.",
+        default="nn_weights_tiny.stnn",
+        help="Path to the input model bundle (or NPZ file).",
     )
     parser.add_argument(
         "-o",
@@ -55,7 +60,61 @@ def main(argv: Optional[Sequence[str]] = None):
         type=Path,
         help="Path to the output directory.",
     )
-    args = parser.parse_args(argv)
-    generate_multipass_shader(
-        args.input, output_dir=args.output_dir or args.input.parent
+    parser.add_argument(
+        "-s",
+        "--scale",
+        type=float,
+        default=1.0,
+        help="Resolution scale of the NN inference pass (e.g. 0.5 or 0.25)",
+    )
+    parser.add_argument(
+        "--upscale-filter",
+        choices=UPSCALE_FILTERS,
+        default="bilinear",
+        help="Filter used to upsample a reduced-resolution inference pass",
+    )
+    parser.add_argument(
+        "--quantization",
+        choices=QUANTIZATIONS,
+        help="Storage format of the weights in Buffer A (default: the one the "
+        "model was trained for)",
+    )
+    parser.add_argument(
+        "--max-texel-fetches",
+        type=float,
+        help="Fail if the estimated texelFetch calls per frame exceed this",
+    )
+    parser.add_argument(
+        "--max-multiply-adds",
+        type=float,
+        help="Fail if the estimated float multiply-adds per frame exceed this",
     )
+    parser.add_argument(
+        "--max-transcendentals",
+        type=float,
+        help="Fail if the estimated transcendental calls per frame exceed this",
+    )
+    args = parser.parse_args(argv)
+    if not 0.0 < args.scale <= 1.0:
+        parser.error("--scale must be in (0, 1]")
+
+    max_cost = {
+        metric: limit
+        for metric, limit in (
+            ("texel_fetches", args.max_texel_fetches),
+            ("multiply_adds", args.max_multiply_adds),
+            ("transcendentals", args.max_transcendentals),
+        )
+        if limit is not None
+    }
+    try:
+        generate_multipass_shader(
+            args.input,
+            output_dir=args.output_dir or args.input.parent,
+            scale=args.scale,
+            upscale_filter=args.upscale_filter,
+            max_cost=max_cost,
+            quantization=args.quantization,
+        )
+    except CostBudgetExceeded as e:
+        parser.exit(1, f"\n❌ {e}\n")
@@ -0,0 +1,153 @@
+# ANTI-CAPITALIST SOFTWARE LICENSE (v 1.4)
+#
+# Copyright © 2026 Jonathan Tremesayques
+#
+# This is anti-capitalist software, released for free use by individuals and
+# organizations that do not operate by capitalist principles.
+#
+# Permission is hereby granted, free of charge, to any person or organization
+# (the "User") obtaining a copy of this software and associated documentation
+# files (the "Software"), to use, copy, modify, merge, distribute, and/or sell
+# copies of the Software, subject to the following conditions:
+#
+#   1. The above copyright notice and this permission notice shall be included
+#      in all copies or modified versions of the Software.
+#
+#   2. The User is one of the following:
+#     a. An individual person, laboring for themselves
+#     b. A non-profit organization
+#     c. An educational institution
+#     d. An organization that seeks shared profit for all of its members, and
+#        allows non-members to set the cost of their labor
+#
+#   3. If the User is an organization with owners, then all owners are workers
+#     and all workers are owners with equal equity and/or equal vote.
+#
+#   4. If the User is an organization, then the User is not law enforcement or
+#      military, or working for or under either.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT EXPRESS OR IMPLIED WARRANTY OF ANY
+# KIND, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF
+# CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from argparse import ArgumentParser
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import polars as pl
+from cv2 import imwrite
+
+from shadertools.nn import build_model, build_tile_classifier
+from shadertools.preview import (
+    frame_pixels,
+    preview_downscaled,
+    render_frame,
+    simulate_early_exit,
+    upscale,
+)
+from shadertools.shader import UPSCALE_FILTERS, load_metadata, load_weights
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = ArgumentParser(
+        description="Preview the reduced-resolution inference of the shader "
+        "and the fragments skipped by its early exit."
+    )
+    parser.add_argument(
+        "-i",
+        "--input",
+        type=Path,
+        default="nn_weights_tiny.stnn",
+        help="Path to the input model bundle (or NPZ file).",
+    )
+    parser.add_argument(
+        "-d",
+        "--data",
+        type=Path,
+        default=Path("video_pixels.parquet"),
+        help="Path to input parquet file with video pixel data",
+    )
+    parser.add_argument(
+        "-s",
+        "--scale",
+        type=float,
+        default=0.5,
+        help="Resolution scale of the NN inference pass",
+    )
+    parser.add_argument(
+        "--upscale-filter",
+        choices=UPSCALE_FILTERS,
+        default="bilinear",
+        help="Filter used to upsample the reduced-resolution inference pass",
+    )
+    parser.add_argument(
+        "-n",
+        "--frames",
+        type=int,
+        default=10,
+        help="Number of evenly spaced frames to preview",
+    )
+    parser.add_argument(
+        "-o",
+        "--output_dir",
+        type=Path,
+        help="Write ground truth | full | scaled comparison images there",
+    )
+    args = parser.parse_args(argv)
+    if not 0.0 < args.scale <= 1.0:
+        parser.error("--scale must be in (0, 1]")
+
+    metadata = load_metadata(args.input)
+    weights = load_weights(args.input)
+    model = build_model(metadata, weights)
+    tile_classifier = build_tile_classifier(metadata, weights)
+    width = metadata.get("width", 480)
+    height = metadata.get("height", 360)
+    total_frames = metadata.get("total_frames", 6572)
+
+    frames = sorted(
+        {int(f) for f in np.linspace(0, total_frames - 1, max(args.frames, 1))}
+    )
+    df = pl.scan_parquet(args.data).filter(pl.col("frame").is_in(frames)).collect()
+
+    preview_downscaled(
+        model,
+        df,
+        width,
+        height,
+        total_frames,
+        frames,
+        scale=args.scale,
+        upscale_filter=args.upscale_filter,
+    )
+    if tile_classifier is not None:
+        simulate_early_exit(
+            model,
+            tile_classifier,
+            df,
+            width,
+            height,
+            total_frames,
+            frames,
+            metadata["early_exit"]["tile_size"],
+            metadata["early_exit"]["confidence"],
+        )
+
+    if args.output_dir is not None:
+        args.output_dir.mkdir(parents=True, exist_ok=True)
+        for frame in frames:
+            truth = frame_pixels(df, frame, width, height)
+            full = render_frame(model, frame, width, height, total_frames)
+            low = render_frame(
+                model, frame, width, height, total_frames, scale=args.scale
+            )
+            scaled = upscale(low, width, height, args.upscale_filter)
+            image = np.concatenate([truth, full, scaled], axis=1)
+            path = args.output_dir / f"preview_{frame:05d}.png"
+            # OpenCV writes BGR
+            imwrite(str(path), (image[..., ::-1] * 255).round().astype(np.uint8))
+        print(f"\nPreview images saved to: {args.output_dir}")
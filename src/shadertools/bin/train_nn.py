@@ -33,22 +33,73 @@
 # CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
 # SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 import json
-from argparse import ArgumentParser
+import os
+import socket
+from argparse import ArgumentParser, Namespace
 from collections.abc import Sequence
 from pathlib import Path
 from typing import Optional
 
+import numpy as np
 import polars as pl
 import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
 from torch.utils.data import DataLoader
 
+from shadertools.bundle import SUFFIX as BUNDLE_SUFFIX
 from shadertools.nn import (
+    HashGridEncoding,
+    TileDataset,
     TinyVideoNet,
     VideoDataset,
+    compress_model,
     evaluate_model,
+    sample_pixels,
+    save_model_bundle,
     save_model_weights,
+    tile_ranges,
     train_model,
 )
+from shadertools.preview import simulate_early_exit
+from shadertools.shader import QUANTIZATIONS, TILE_CONFIDENCE, TILE_SIZE
+from shadertools.video import pixel_columns
+
+# Focus on Tiny architectures for Shadertoy (no custom textures)
+# Optimized for best quality within code size constraints
+ARCHITECTURES = [
+    {
+        "name": "Tiny",
+        "hidden": [32, 64, 32],
+        "encoding": None,
+        "sample_rate": 0.05,  # 5% of data for better quality
+        "epochs": 30,  # More training for better convergence
+        "batch_size": 8192,
+    },
+    {
+        # Learned hash-grid features do most of the work: the per-fragment
+        # cost is a few texture lookups plus a very small network
+        "name": "Grid",
+        "hidden": [16, 16],
+        "encoding": {
+            "levels": 6,
+            "table_size": 128,
+            "base_resolution": 4,
+            "max_resolution": 64,
+        },
+        "sample_rate": 0.05,
+        "epochs": 30,
+        "batch_size": 8192,
+    },
+]
+
+# Coarse classifier of solid tiles, evaluated before the main network
+TILE_CLASSIFIER = {
+    "hidden": [8, 8],
+    "epochs": 30,
+    "batch_size": 1024,
+    "lr": 0.01,
+}
 
 
 def main(argv: Optional[Sequence[str]] = None):
@@ -66,79 +117,326 @@ def main(argv: Optional[Sequence[str]] = None):
         "-o",
         "--output",
         type=Path,
-        default=Path("nn_weights.json"),
-        help="Path to output JSON file for model weights",
+        default=Path("nn_weights" + BUNDLE_SUFFIX),
+        help="Path to output model bundle (or JSON file for the legacy "
+        "JSON + NPZ + metadata files)",
+    )
+    parser.add_argument(
+        "-a",
+        "--architecture",
+        nargs="+",
+        choices=[config["name"].lower() for config in ARCHITECTURES],
+        default=["tiny"],
+        help="Architectures to train",
+    )
+    parser.add_argument(
+        "--prune",
+        type=float,
+        default=1.0,
+        metavar="KEEP_RATIO",
+        help="Prune the hidden layers after training, keeping this fraction of "
+        "their neurons, and distill from the unpruned model",
+    )
+    parser.add_argument(
+        "--prune-epochs",
+        type=int,
+        default=3,
+        help="Fine-tuning epochs after pruning each hidden layer",
+    )
+    parser.add_argument(
+        "--quantize",
+        choices=QUANTIZATIONS,
+        help="Train with the weights rounded to this shader storage format "
+        "(quantization-aware training)",
+    )
+    parser.add_argument(
+        "--range-weight",
+        type=float,
+        default=0.0,
+        help="Weight of the penalty on weights outside [-1, 1], the range "
+        "of the affine storage format",
+    )
+    parser.add_argument(
+        "--early-exit",
+        action="store_true",
+        help="Also train a coarse classifier of solid black/white tiles, "
+        "which the shaders output without running the network",
+    )
+    parser.add_argument(
+        "--tile-size",
+        type=int,
+        default=TILE_SIZE,
+        help="Tile size of the early-exit classifier, in pixels",
+    )
+    parser.add_argument(
+        "--tile-confidence",
+        type=float,
+        default=TILE_CONFIDENCE,
+        help="Classifier probability above which a tile is output as solid",
+    )
+    parser.add_argument(
+        "--nproc",
+        type=int,
+        default=1,
+        help="Number of local CPU processes for data-parallel training (gloo)",
     )
     args = parser.parse_args(argv)
+    if args.nproc < 1:
+        parser.error("--nproc must be at least 1")
+    if not 0.0 < args.prune <= 1.0:
+        parser.error("--prune must be in (0, 1]")
+    if args.tile_size < 1:
+        parser.error("--tile-size must be at least 1")
+    if not 0.5 <= args.tile_confidence < 1.0:
+        parser.error("--tile-confidence must be in [0.5, 1)")
+
+    if args.nproc == 1:
+        train(0, 1, args)
+        return
+
+    # Rendezvous on a free local port, inherited by the spawned ranks
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    os.environ["MASTER_ADDR"] = "127.0.0.1"
+    os.environ["MASTER_PORT"] = str(port)
+
+    mp.spawn(train, args=(args.nproc, args), nprocs=args.nproc)
 
-    """Main training pipeline."""
-    # Load video data
-    print("Loading video data...")
-    df = pl.read_parquet(args.input)
+
+def train(rank: int, world_size: int, args: Namespace):
+    """Main training pipeline, run by each data-parallel rank."""
+    distributed = world_size > 1
+    if distributed:
+        dist.init_process_group("gloo", rank=rank, world_size=world_size)
+        # Split the cores between ranks instead of oversubscribing them
+        torch.set_num_threads(max(1, (os.cpu_count() or 1) // world_size))
+
+    try:
+        train_architectures(rank, world_size, args)
+    finally:
+        if distributed:
+            dist.destroy_process_group()
+
+
+def from_main(value):
+    """Value computed by rank 0, sent to every rank."""
+    if not dist.is_initialized():
+        return value
+    values = [value]
+    dist.broadcast_object_list(values, src=0)
+    return values[0]
+
+
+def train_architectures(rank: int, world_size: int, args: Namespace):
+    is_main = rank == 0
+
+    # Load video data. Only rank 0 loads the whole table, for the full-table
+    # passes (evaluation, tile ranges); the other ranks load their shards.
+    if is_main:
+        print("Loading video data...")
+    pixels = pl.scan_parquet(args.input)
+    df = pixels.collect() if is_main else None
 
     # Get video dimensions
-    width = df.select(pl.col("x").max()).item() + 1
-    height = df.select(pl.col("y").max()).item() + 1
-    total_frames = df.select(pl.col("frame").max()).item() + 1
+    width, height, total_frames, total_pixels = (
+        pixels.select(
+            pl.col("x").max() + 1,
+            pl.col("y").max() + 1,
+            pl.col("frame").max() + 1,
+            pl.len(),
+        )
+        .collect()
+        .row(0)
+    )
+    channels = len(pixel_columns(pixels))
 
-    print(f"Video: {width}×{height}, {total_frames} frames")
-    print(f"Total pixels: {len(df):,}")
+    if is_main:
+        print(f"Video: {width}×{height}, {total_frames} frames, {channels} channel(s)")
+        print(f"Total pixels: {total_pixels:,}")
 
-    # Check for GPU
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-    print(f"Device: {device}")
+    # Check for GPU (gloo data-parallel training runs on CPU)
+    device = "cuda" if torch.cuda.is_available() and world_size == 1 else "cpu"
+    if is_main:
+        print(f"Device: {device}")
 
-    # Focus on Tiny architecture for Shadertoy (no custom textures)
-    # Optimized for best quality within code size constraints
     architectures = [
-        {
-            "name": "Tiny",
-            "hidden": [32, 64, 32],
-            "sample_rate": 0.05,  # 5% of data for better quality
-            "epochs": 30,  # More training for better convergence
-            "batch_size": 8192,
-        },
+        config
+        for config in ARCHITECTURES
+        if config["name"].lower() in args.architecture
     ]
 
     for config in architectures:
-        print(f"\n{'=' * 80}")
-        print(f"Training {config['name']} Network: {config['hidden']}")
-        print(f"{'=' * 80}")
+        if is_main:
+            print(f"\n{'=' * 80}")
+            print(f"Training {config['name']} Network: {config['hidden']}")
+            print(f"{'=' * 80}")
 
         # Create dataset (sample for faster training)
         dataset = VideoDataset(
-            df, width, height, total_frames, sample_rate=config["sample_rate"]
+            pixels,
+            width,
+            height,
+            total_frames,
+            sample_rate=config["sample_rate"],
+            rank=rank,
+            world_size=world_size,
         )
+        # Keep the global batch size: each rank processes its share of it
         dataloader = DataLoader(
-            dataset, batch_size=config["batch_size"], shuffle=True, num_workers=0
+            dataset,
+            batch_size=max(1, config["batch_size"] // world_size),
+            shuffle=True,
+            num_workers=0,
         )
 
-        # Create model
-        model = TinyVideoNet(hidden_sizes=config["hidden"])
+        # Create model (DDP broadcasts the rank 0 initial weights)
+        encoding = (
+            HashGridEncoding(**config["encoding"]) if config["encoding"] else None
+        )
+        model = TinyVideoNet(
+            hidden_sizes=config["hidden"], encoding=encoding, channels=channels
+        )
 
         # Train
+        quantization_kwargs = {
+            "quantization": args.quantize,
+            "range_weight": args.range_weight,
+        }
         model = train_model(
-            model, dataloader, epochs=config["epochs"], lr=0.001, device=device
+            model,
+            dataloader,
+            epochs=config["epochs"],
+            lr=0.001,
+            device=device,
+            **quantization_kwargs,
         )
 
         # Evaluate
-        evaluate_model(model, df, width, height, total_frames, device=device)
+        if is_main:
+            psnr = evaluate_model(model, df, width, height, total_frames, device=device)
 
-        # Save weights
-        output_path = args.output.with_name(
-            f"{args.output.stem}_{config['name'].lower()}{args.output.suffix}"
-        )
-        weights = save_model_weights(model, output_path)
+        # Compress (every rank prunes the same neurons, ranked on the rank 0
+        # sample, then fine-tunes on its shard)
+        if args.prune < 1.0:
+            macs = model.count_macs()
+            inputs = from_main(
+                sample_pixels(df, width, height, total_frames)[0] if is_main else None
+            )
+            model = compress_model(
+                model,
+                dataloader,
+                inputs,
+                keep_ratio=args.prune,
+                epochs=args.prune_epochs,
+                device=device,
+                **quantization_kwargs,
+            )
+
+            if is_main:
+                pruned_psnr = evaluate_model(
+                    model, df, width, height, total_frames, device=device
+                )
+                pruned_macs = model.count_macs()
+                print(
+                    f"\nPruned hidden sizes: {config['hidden']} -> {model.hidden_sizes}"
+                )
+                print(
+                    f"Multiply-adds per fragment: {macs:,} -> {pruned_macs:,} "
+                    f"({(1 - pruned_macs / macs) * 100:.1f}% saved)"
+                )
+                print(
+                    f"Per frame ({width}×{height}): "
+                    f"{2 * macs * width * height / 1e6:.1f} -> "
+                    f"{2 * pruned_macs * width * height / 1e6:.1f} MFLOP"
+                )
+                print(
+                    f"PSNR: {psnr:.2f} dB -> {pruned_psnr:.2f} dB "
+                    f"({pruned_psnr - psnr:+.2f} dB)"
+                )
+
+        # Early-exit classifier of solid tiles
+        tile_classifier = None
+        if args.early_exit:
+            if is_main:
+                print(f"\nTraining tile classifier: {TILE_CLASSIFIER['hidden']}")
+            tile_dataset = TileDataset(
+                from_main(tile_ranges(df, args.tile_size) if is_main else None),
+                width,
+                height,
+                total_frames,
+                args.tile_size,
+                rank=rank,
+                world_size=world_size,
+            )
+            # Short clips have few tiles: keep a few steps per epoch
+            tile_loader = DataLoader(
+                tile_dataset,
+                batch_size=max(
+                    1,
+                    min(
+                        TILE_CLASSIFIER["batch_size"] // world_size,
+                        len(tile_dataset) // 16,
+                    ),
+                ),
+                shuffle=True,
+                num_workers=0,
+            )
+            tile_classifier = train_model(
+                TinyVideoNet(hidden_sizes=TILE_CLASSIFIER["hidden"], channels=2),
+                tile_loader,
+                epochs=TILE_CLASSIFIER["epochs"],
+                lr=TILE_CLASSIFIER["lr"],
+                device=device,
+                **quantization_kwargs,
+            )
 
-        # Save model metadata
+            if is_main:
+                frames = sorted({int(f) for f in np.linspace(0, total_frames - 1, 10)})
+                simulate_early_exit(
+                    model,
+                    tile_classifier,
+                    df,
+                    width,
+                    height,
+                    total_frames,
+                    frames,
+                    args.tile_size,
+                    args.tile_confidence,
+                    device=device,
+                )
+
+        if not is_main:
+            continue
+
+        # Save weights and model metadata
         metadata = {
             "architecture": config["name"],
-            "hidden_sizes": config["hidden"],
+            "hidden_sizes": model.hidden_sizes,
+            "encoding": encoding.config() if encoding else None,
+            "channels": channels,
+            "quantization": args.quantize or "affine",
+            "early_exit": {
+                "hidden_sizes": tile_classifier.hidden_sizes,
+                "tile_size": args.tile_size,
+                "confidence": args.tile_confidence,
+            }
+            if tile_classifier
+            else None,
             "total_parameters": model.count_parameters(),
             "width": width,
             "height": height,
             "total_frames": total_frames,
         }
+        output_path = args.output.with_name(
+            f"{args.output.stem}_{config['name'].lower()}{args.output.suffix}"
+        )
+        if output_path.suffix == BUNDLE_SUFFIX:
+            save_model_bundle(model, metadata, output_path, tile_classifier)
+            continue
+
+        # Legacy JSON + NPZ + metadata files
+        save_model_weights(model, output_path, tile_classifier)
         metadata_path = output_path.with_name(
             f"{args.output.stem}_{config['name'].lower()}_metadata{args.output.suffix}"
         )
@@ -0,0 +1,156 @@
+# ANTI-CAPITALIST SOFTWARE LICENSE (v 1.4)
+#
+# Copyright © 2026 Jonathan Tremesayques
+#
+# This is anti-capitalist software, released for free use by individuals and
+# organizations that do not operate by capitalist principles.
+#
+# Permission is hereby granted, free of charge, to any person or organization
+# (the "User") obtaining a copy of this software and associated documentation
+# files (the "Software"), to use, copy, modify, merge, distribute, and/or sell
+# copies of the Software, subject to the following conditions:
+#
+#   1. The above copyright notice and this permission notice shall be included
+#      in all copies or modified versions of the Software.
+#
+#   2. The User is one of the following:
+#     a. An individual person, laboring for themselves
+#     b. A non-profit organization
+#     c. An educational institution
+#     d. An organization that seeks shared profit for all of its members, and
+#        allows non-members to set the cost of their labor
+#
+#   3. If the User is an organization with owners, then all owners are workers
+#     and all workers are owners with equal equity and/or equal vote.
+#
+#   4. If the User is an organization, then the User is not law enforcement or
+#      military, or working for or under either.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT EXPRESS OR IMPLIED WARRANTY OF ANY
+# KIND, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF
+# CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""Single-file binary model bundle.
+
+Layout of a bundle file (all integers little-endian):
+
+    magic            4 bytes   b"STNN"
+    version          uint32
+    header size      uint64    size in bytes of the JSON header
+    header           JSON      UTF-8, padded with spaces up to ALIGNMENT
+    data             float32   every tensor, back to back, in layer order
+
+The header holds the model metadata (architecture, dimensions...), the
+tensors (name, shape and index of their first value in the data section) in
+the order the shaders read them, and the texture packing info. The data
+section is the flattened weight buffer stored in Buffer A, starting on an
+aligned offset so that it can be memory-mapped.
+"""
+
+import json
+import os
+import struct
+from pathlib import Path
+
+import numpy as np
+
+MAGIC = b"STNN"
+VERSION = 1
+ALIGNMENT = 64
+DTYPE = np.dtype("<f4")
+SUFFIX = ".stnn"
+
+# Weights are packed 4 per RGBA texel of Buffer A
+VALUES_PER_TEXEL = 4
+
+_PREAMBLE = struct.Struct("<4sIQ")
+
+
+def texture_size(total_weights: int) -> int:
+    """Side of the square Buffer A texture holding the weights."""
+    num_pixels = (total_weights + VALUES_PER_TEXEL - 1) // VALUES_PER_TEXEL
+    return int(np.ceil(np.sqrt(num_pixels)))
+
+
+def save_bundle(
+    path: Path, weights_dict: dict[str, np.ndarray], metadata: dict
+) -> None:
+    """Write the weights, in iteration order, and the metadata to a bundle.
+
+    The bundle is written next to `path` and then moved over it, so an
+    existing file, possibly memory-mapped by `load_bundle`, is never
+    truncated.
+    """
+    path = Path(path)
+    tensors = []
+    index = 0
+    for name, param in weights_dict.items():
+        shape = list(np.shape(param))
+        tensors.append({"name": name, "shape": shape, "index": index})
+        index += int(np.prod(shape, dtype=np.int64))
+
+    header = {
+        "metadata": metadata,
+        "dtype": DTYPE.str,
+        "tensors": tensors,
+        "packing": {
+            "values_per_texel": VALUES_PER_TEXEL,
+            "total_weights": index,
+            "texture_size": texture_size(index),
+        },
+    }
+    header_bytes = json.dumps(header).encode()
+    data_offset = -(-(_PREAMBLE.size + len(header_bytes)) // ALIGNMENT) * ALIGNMENT
+    header_bytes = header_bytes.ljust(data_offset - _PREAMBLE.size, b" ")
+
+    temporary_path = path.with_name(f".{path.name}.tmp")
+    try:
+        with open(temporary_path, "wb") as f:
+            f.write(_PREAMBLE.pack(MAGIC, VERSION, len(header_bytes)))
+            f.write(header_bytes)
+            for param in weights_dict.values():
+                f.write(np.ascontiguousarray(param, dtype=DTYPE).tobytes())
+        os.replace(temporary_path, path)
+    finally:
+        temporary_path.unlink(missing_ok=True)
+
+
+def read_header(path: Path) -> tuple[dict, int]:
+    """Read the header of a bundle and the offset of its data section."""
+    with open(path, "rb") as f:
+        magic, version, header_size = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+        if magic != MAGIC:
+            raise ValueError(f"Not a model bundle: {path}")
+        if version != VERSION:
+            raise ValueError(f"Unsupported bundle version {version}: {path}")
+        header = json.loads(f.read(header_size))
+
+    return header, _PREAMBLE.size + header_size
+
+
+def load_bundle(path: Path) -> tuple[dict[str, np.ndarray], dict]:
+    """Memory-map a bundle.
+
+    Returns:
+        The weights, read-only views of the mapped data section in layer
+        order, and the metadata
+    """
+    header, data_offset = read_header(path)
+    total_weights = header["packing"]["total_weights"]
+    data = np.memmap(
+        path,
+        dtype=np.dtype(header["dtype"]),
+        mode="r",
+        offset=data_offset,
+        shape=(total_weights,),
+    )
+
+    weights = {}
+    for tensor in header["tensors"]:
+        size = int(np.prod(tensor["shape"], dtype=np.int64))
+        start = tensor["index"]
+        weights[tensor["name"]] = data[start : start + size].reshape(tensor["shape"])
+
+    return weights, header["metadata"]
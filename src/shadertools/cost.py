@@ -0,0 +1,327 @@
+# ANTI-CAPITALIST SOFTWARE LICENSE (v 1.4)
+#
+# Copyright © 2026 Jonathan Tremesayques
+#
+# This is anti-capitalist software, released for free use by individuals and
+# organizations that do not operate by capitalist principles.
+#
+# Permission is hereby granted, free of charge, to any person or organization
+# (the "User") obtaining a copy of this software and associated documentation
+# files (the "Software"), to use, copy, modify, merge, distribute, and/or sell
+# copies of the Software, subject to the following conditions:
+#
+#   1. The above copyright notice and this permission notice shall be included
+#      in all copies or modified versions of the Software.
+#
+#   2. The User is one of the following:
+#     a. An individual person, laboring for themselves
+#     b. A non-profit organization
+#     c. An educational institution
+#     d. An organization that seeks shared profit for all of its members, and
+#        allows non-members to set the cost of their labor
+#
+#   3. If the User is an organization with owners, then all owners are workers
+#     and all workers are owners with equal equity and/or equal vote.
+#
+#   4. If the User is an organization, then the User is not law enforcement or
+#      military, or working for or under either.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT EXPRESS OR IMPLIED WARRANTY OF ANY
+# KIND, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF
+# CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import ast
+import operator
+import re
+from collections import Counter
+
+# Cost metrics, estimated per fragment from the GLSL source
+METRICS = ("texel_fetches", "multiply_adds", "transcendentals", "loop_iterations")
+
+TRANSCENDENTALS = (
+    "exp",
+    "exp2",
+    "log",
+    "log2",
+    "pow",
+    "sqrt",
+    "inversesqrt",
+    "sin",
+    "cos",
+    "tan",
+    "asin",
+    "acos",
+    "atan",
+    "sinh",
+    "cosh",
+    "tanh",
+)
+
+_COMMENT_RE = re.compile(r"//[^\n]*|/\*.*?\*/", re.DOTALL)
+_CONST_INT_RE = re.compile(r"\bconst\s+int\s+(\w+)\s*=\s*([^;\[\]]+);")
+_FUNCTION_RE = re.compile(r"\b\w+\s+(\w+)\s*\([^()]*\)\s*\{")
+_FOR_RE = re.compile(r"\bfor\s*\(")
+_LOOP_HEADER_RE = re.compile(
+    r"\s*(?:int\s+)?(\w+)\s*=\s*([^;]+);\s*(\w+)\s*(<=|<)\s*([^;]+);"
+)
+_RETURN_RE = re.compile(r"\breturn\b")
+_TEXEL_FETCH_RE = re.compile(r"\btexelFetch\s*\(")
+_TRANSCENDENTAL_RE = re.compile(r"\b(?:%s)\s*\(" % "|".join(TRANSCENDENTALS))
+_ACCUMULATE_RE = re.compile(r"\+=([^;]*);")
+_MULTIPLY_RE = re.compile(r"\*(?!=)")
+_LEFT_OPERAND_RE = re.compile(r"([\w.]+)\s*$")
+_RIGHT_OPERAND_RE = re.compile(r"\s*([\w.]+)")
+_INT_DECLARATION_RE = re.compile(r"\b(?:int|uint|[iu]vec[234])\s+(\w+)")
+_INT_LITERAL_RE = re.compile(r"\d+u?|0[xX][\da-fA-F]+u?")
+
+# Integer operators allowed in constant expressions (GLSL division truncates)
+_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: lambda a, b: abs(a) // abs(b) * (1 if (a < 0) == (b < 0) else -1),
+    ast.Mod: lambda a, b: a - b * _OPERATORS[ast.Div](a, b),
+}
+
+
+class CostBudgetExceeded(RuntimeError):
+    """Raised when the estimated cost of the shaders exceeds a budget."""
+
+
+def _matching(code: str, start: int, opening: str, closing: str) -> int:
+    """Index of the bracket closing the one at `start`."""
+    depth = 0
+    for i in range(start, len(code)):
+        if code[i] == opening:
+            depth += 1
+        elif code[i] == closing:
+            depth -= 1
+            if depth == 0:
+                return i
+    raise ValueError(f"Unbalanced '{opening}' at offset {start}")
+
+
+def _evaluate(expression: str, consts: dict[str, int]) -> int | None:
+    """Value of a constant integer expression, None if not constant.
+
+    Only integer literals, known constants, `+ - * / %` and parentheses are
+    accepted.
+    """
+
+    def evaluate(node: ast.AST) -> int | None:
+        if isinstance(node, ast.Constant) and type(node.value) is int:
+            return node.value
+        if isinstance(node, ast.Name):
+            return consts.get(node.id)
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.UAdd, ast.USub)):
+            operand = evaluate(node.operand)
+            if operand is None:
+                return None
+            return -operand if isinstance(node.op, ast.USub) else operand
+        if isinstance(node, ast.BinOp) and type(node.op) in _OPERATORS:
+            left = evaluate(node.left)
+            right = evaluate(node.right)
+            if left is None or right is None:
+                return None
+            if isinstance(node.op, (ast.Div, ast.Mod)) and right == 0:
+                return None
+            return _OPERATORS[type(node.op)](left, right)
+        return None
+
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError:
+        return None
+    return evaluate(tree.body)
+
+
+def _multiply_adds(code: str, ints: set[str]) -> int:
+    """Float multiplies accumulated with `+=`.
+
+    Index arithmetic is left out: a multiply with an integer literal or
+    integer variable operand is not counted.
+    """
+    count = 0
+    for expression in _ACCUMULATE_RE.findall(code):
+        for match in _MULTIPLY_RE.finditer(expression):
+            left = _LEFT_OPERAND_RE.search(expression[: match.start()])
+            right = _RIGHT_OPERAND_RE.match(expression[match.end() :])
+            operands = [operand.group(1) for operand in (left, right) if operand]
+            if not any(
+                operand in ints or _INT_LITERAL_RE.fullmatch(operand)
+                for operand in operands
+            ):
+                count += 1
+    return count
+
+
+def _straight_line_cost(
+    code: str, ints: set[str], functions: dict[str, Counter]
+) -> Counter:
+    cost = Counter(
+        texel_fetches=len(_TEXEL_FETCH_RE.findall(code)),
+        transcendentals=len(_TRANSCENDENTAL_RE.findall(code)),
+        multiply_adds=_multiply_adds(code, ints),
+    )
+    for name, function_cost in functions.items():
+        calls = len(re.findall(r"\b%s\s*\(" % name, code))
+        for metric, value in function_cost.items():
+            cost[metric] += calls * value
+    return cost
+
+
+def _block_cost(
+    code: str, consts: dict[str, int], ints: set[str], functions: dict[str, Counter]
+) -> Counter:
+    """Cost of a block, loops multiplied by their trip counts.
+
+    Both sides of every branch are counted, the estimate is an upper bound.
+    """
+    cost = Counter()
+    position = 0
+    for match in _FOR_RE.finditer(code):
+        if match.start() < position:
+            # Nested loop, already counted in the body of its parent
+            continue
+        cost += _straight_line_cost(code[position : match.start()], ints, functions)
+
+        header_end = _matching(code, match.end() - 1, "(", ")")
+        body_start = header_end + 1
+        while code[body_start].isspace():
+            body_start += 1
+        if code[body_start] == "{":
+            body_end = _matching(code, body_start, "{", "}")
+            body = code[body_start + 1 : body_end]
+        else:
+            body_end = code.index(";", body_start)
+            body = code[body_start:body_end]
+
+        trips = 1
+        header = _LOOP_HEADER_RE.match(code[match.end() : header_end + 1])
+        if header is not None and header.group(1) == header.group(3):
+            first = _evaluate(header.group(2), consts)
+            last = _evaluate(header.group(5), consts)
+            if first is not None and last is not None:
+                trips = max(0, last - first + (header.group(4) == "<="))
+
+        body_cost = _block_cost(body, consts, ints, functions)
+        for metric, value in body_cost.items():
+            cost[metric] += trips * value
+        cost["loop_iterations"] += trips
+        position = body_end + 1
+
+    cost += _straight_line_cost(code[position:], ints, functions)
+    return cost
+
+
+def analyze_shader(
+    source: str, entry_point: str = "mainImage", early_return: bool = False
+) -> dict[str, int]:
+    """Estimate the cost of one fragment of a shader from its GLSL source.
+
+    Functions are inlined at their call sites and loops with constant bounds
+    are unrolled. Multiply-adds are the float `*` operators in `+=`
+    accumulations (as in the network dot products), whatever the vector size
+    of their operands; integer index arithmetic is not counted.
+
+    With `early_return`, only the code of the entry point before its first
+    `return` is costed (fragments outside the region a pass computes).
+    """
+    code = _COMMENT_RE.sub("", source)
+    ints = set(_INT_DECLARATION_RE.findall(code))
+    consts = {}
+    for name, expression in _CONST_INT_RE.findall(code):
+        value = _evaluate(expression, consts)
+        if value is not None:
+            consts[name] = value
+
+    # Functions are defined before use in GLSL: cost them in order
+    functions = {}
+    body_end = 0
+    for match in _FUNCTION_RE.finditer(code):
+        if match.start() < body_end:
+            # Block inside a function body
+            continue
+        body_end = _matching(code, match.end() - 1, "{", "}")
+        body = code[match.end() : body_end]
+        if early_return and match.group(1) == entry_point:
+            first_return = _RETURN_RE.search(body)
+            if first_return is None:
+                raise ValueError(f"No return in entry point: {entry_point}")
+            body = body[: first_return.start()]
+        functions[match.group(1)] = _block_cost(body, consts, ints, functions)
+
+    if entry_point not in functions:
+        raise ValueError(f"Entry point not found: {entry_point}")
+    cost = functions[entry_point]
+    return {metric: cost[metric] for metric in METRICS}
+
+
+def network_cost(layer_info: list[dict], encoding: dict | None = None) -> dict:
+    """Expected per-fragment cost of the network from its architecture."""
+    multiply_adds = sum(layer["input"] * layer["output"] for layer in layer_info)
+    weights = sum(layer["weight_size"] + layer["bias_size"] for layer in layer_info)
+    # 8 corners of one RGBA texel per grid level
+    grid_fetches = 8 * encoding["levels"] if encoding else 0
+    return {
+        "texel_fetches": weights + grid_fetches,
+        "multiply_adds": multiply_adds,
+        "transcendentals": layer_info[-1]["output"],
+    }
+
+
+def estimate_frame_cost(
+    passes: dict[str, tuple[str, int]], early_returns: dict[str, int] | None = None
+) -> dict[str, dict]:
+    """Per-fragment and per-frame cost of each pass.
+
+    Args:
+        passes: GLSL source and fragments rendered per frame, by pass name
+        early_returns: Number of those fragments taking the first return of
+            the entry point, by pass name. They are billed at the cost of the
+            code before it, the other fragments at the full cost.
+
+    Returns:
+        Cost by pass name, plus the per-frame sums under "total"
+    """
+    early_returns = early_returns or {}
+    report = {}
+    total = Counter()
+    for name, (source, fragments) in passes.items():
+        per_fragment = analyze_shader(source)
+        returned = early_returns.get(name, 0)
+        per_early_return = (
+            analyze_shader(source, early_return=True)
+            if returned
+            else dict.fromkeys(METRICS, 0)
+        )
+        per_frame = {
+            metric: value * (fragments - returned) + per_early_return[metric] * returned
+            for metric, value in per_fragment.items()
+        }
+        report[name] = {
+            "fragments": fragments,
+            "early_returns": returned,
+            "per_fragment": per_fragment,
+            "per_early_return": per_early_return,
+            "per_frame": per_frame,
+        }
+        total.update(per_frame)
+
+    report["total"] = {"per_frame": {metric: total[metric] for metric in METRICS}}
+    return report
+
+
+def check_budget(report: dict[str, dict], budget: dict[str, float]) -> None:
+    """Raise CostBudgetExceeded if a per-frame total exceeds its budget."""
+    exceeded = [
+        f"{metric}: {report['total']['per_frame'][metric]:,} > {limit:,.0f}"
+        for metric, limit in budget.items()
+        if report["total"]["per_frame"][metric] > limit
+    ]
+    if exceeded:
+        raise CostBudgetExceeded(
+            "Shader cost exceeds the budget per frame: " + ", ".join(exceeded)
+        )
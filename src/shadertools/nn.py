@@ -32,50 +32,83 @@
 # LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF
 # CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
 # SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import copy
 import json
 from pathlib import Path
 
 import numpy as np
 import polars as pl
 import torch
+import torch.distributed as dist
 import torch.nn as nn
 import torch.optim as optim
+from torch.func import functional_call
+from torch.nn.parallel import DistributedDataParallel
 from torch.utils.data import DataLoader, Dataset
 from tqdm import tqdm
 
+from shadertools.bundle import save_bundle
+from shadertools.shader import INT8_LEVELS, QUANTIZATIONS, TILE_PREFIX
+from shadertools.video import pixel_columns
+
+# Largest distance to black or white of the pixels of a solid tile
+SOLID_TOLERANCE = 0.05
+# Granularity of the training sample rate
+SAMPLE_RESOLUTION = 1_000_000
+
 
 class VideoDataset(Dataset):
     """Dataset for video pixels."""
 
     def __init__(
         self,
-        df: pl.DataFrame,
+        df: pl.DataFrame | pl.LazyFrame,
         width: int,
         height: int,
         total_frames: int,
         sample_rate: float = 1.0,
+        rank: int = 0,
+        world_size: int = 1,
     ):
         """
         Args:
-            df: Polars DataFrame with pixel data
+            df: Polars DataFrame with pixel data, or a LazyFrame scanning it
+                so that only the sampled pixels are loaded
             width, height: Video dimensions
             total_frames: Number of frames
             sample_rate: Fraction of pixels to use for training (1.0 = all pixels)
+            rank, world_size: Keep only the rank-th of world_size equal shards
+                of the sample (data-parallel training)
         """
         self.width = width
         self.height = height
         self.total_frames = total_frames
 
-        # Sample data if needed
+        # Sample data if needed. Rows are drawn by a seeded hash of their
+        # index, so every rank draws the same sample without loading the rest.
+        pixels = df.lazy().with_row_index("row")
         if sample_rate < 1.0:
-            n_samples = int(len(df) * sample_rate)
-            df = df.sample(n=n_samples, shuffle=True, seed=42)
+            pixels = pixels.filter(
+                pl.col("row").hash(seed=42) % SAMPLE_RESOLUTION
+                < int(sample_rate * SAMPLE_RESOLUTION)
+            )
+
+        # Shard the sample across ranks, one row in world_size each. Shards
+        # have equal lengths so that all ranks run the same number of steps.
+        if world_size > 1:
+            shard_size = pixels.select(pl.len()).collect().item() // world_size
+            pixels = pixels.with_row_index("sample").filter(
+                (pl.col("sample") % world_size == rank)
+                & (pl.col("sample") < shard_size * world_size)
+            )
+        df = pixels.collect(engine="streaming")
 
         # Convert to numpy for faster access
         self.frames = df.select("frame").to_numpy().flatten().astype(np.float32)
         self.xs = df.select("x").to_numpy().flatten().astype(np.float32)
         self.ys = df.select("y").to_numpy().flatten().astype(np.float32)
-        self.pixels = df.select("pixel_value").to_numpy().flatten().astype(np.float32)
+        # One column per channel (grayscale or RGB)
+        self.pixels = df.select(pixel_columns(df)).to_numpy().astype(np.float32)
 
         # Normalize inputs to [0, 1]
         self.frames /= total_frames
@@ -85,8 +118,10 @@ class VideoDataset(Dataset):
         # Normalize outputs to [0, 1]
         self.pixels /= 255.0
 
+        shard = f", shard {rank + 1}/{world_size}" if world_size > 1 else ""
         print(
-            f"Dataset: {len(self.frames):,} pixels ({sample_rate * 100:.1f}% of total)"
+            f"Dataset: {len(self.frames):,} pixels "
+            f"({sample_rate * 100:.1f}% of total{shard})"
         )
 
     def __len__(self) -> int:
@@ -97,23 +132,200 @@ class VideoDataset(Dataset):
         x = torch.tensor(
             [self.frames[idx], self.xs[idx], self.ys[idx]], dtype=torch.float32
         )
-        # Output: pixel_value_normalized
-        y = torch.tensor([self.pixels[idx]], dtype=torch.float32)
+        # Output: pixel values normalized, one per channel
+        y = torch.tensor(self.pixels[idx], dtype=torch.float32)
         return x, y
 
 
+class TileDataset(Dataset):
+    """Dataset of frame tiles for the early-exit classifier.
+
+    Inputs are the normalized tile centers, the way the shaders compute
+    them, and the two targets whether the tile is solid black and whether it
+    is solid white (every pixel within SOLID_TOLERANCE).
+    """
+
+    def __init__(
+        self,
+        tiles: pl.DataFrame,
+        width: int,
+        height: int,
+        total_frames: int,
+        tile_size: int,
+        rank: int = 0,
+        world_size: int = 1,
+    ):
+        """
+        Args:
+            tiles: Pixel range of each tile, from `tile_ranges`
+            width, height: Video dimensions
+            total_frames: Number of frames
+            tile_size: Tile width and height in pixels
+            rank, world_size: Keep only the rank-th of world_size equal shards
+                of the tiles (data-parallel training)
+        """
+        # Same shuffled order on every rank, one contiguous slice each
+        if world_size > 1:
+            tiles = tiles.sample(fraction=1.0, shuffle=True, seed=42)
+            shard_size = len(tiles) // world_size
+            tiles = tiles.slice(rank * shard_size, shard_size)
+
+        centers = (tiles.select("tile_x", "tile_y").to_numpy() + 0.5) * tile_size
+        self.inputs = np.stack(
+            [
+                tiles["frame"].to_numpy() / total_frames,
+                centers[:, 0] / width,
+                centers[:, 1] / height,
+            ],
+            axis=1,
+        ).astype(np.float32)
+        self.targets = np.stack(
+            [
+                tiles["max"].to_numpy() <= SOLID_TOLERANCE * 255,
+                tiles["min"].to_numpy() >= (1 - SOLID_TOLERANCE) * 255,
+            ],
+            axis=1,
+        ).astype(np.float32)
+
+        shard = f", shard {rank + 1}/{world_size}" if world_size > 1 else ""
+        print(
+            f"Tile dataset: {len(self.inputs):,} tiles of {tile_size}×{tile_size}, "
+            f"{self.targets.any(axis=1).mean() * 100:.1f}% solid{shard}"
+        )
+
+    def __len__(self) -> int:
+        return len(self.inputs)
+
+    def __getitem__(self, idx) -> tuple[torch.Tensor, torch.Tensor]:
+        return torch.from_numpy(self.inputs[idx]), torch.from_numpy(self.targets[idx])
+
+
+class HashGridEncoding(nn.Module):
+    """Multi-resolution hash-grid encoding of (frame, x, y) (Instant-NGP).
+
+    Each level is a grid over the unit cube whose vertices hold learned
+    feature vectors. Coarse levels that fit in the table are stored densely,
+    finer levels are hashed into a table of fixed size. The encoding of a
+    point is the concatenation over levels of the trilinearly interpolated
+    features of its 8 surrounding vertices.
+    """
+
+    # One RGBA texel per grid vertex in the shader
+    FEATURES_PER_LEVEL = 4
+    # Spatial hash primes from Instant-NGP
+    PRIMES = (1, 2654435761, 805459861)
+
+    def __init__(
+        self,
+        levels: int = 6,
+        table_size: int = 128,
+        base_resolution: int = 4,
+        max_resolution: int = 64,
+    ):
+        """
+        Args:
+            levels: Number of grid levels
+            table_size: Maximum number of vertices stored per level
+            base_resolution: Grid resolution of the coarsest level
+            max_resolution: Grid resolution of the finest level
+        """
+        super().__init__()
+
+        self.levels = levels
+        self.table_size = table_size
+        self.base_resolution = base_resolution
+        self.max_resolution = max_resolution
+
+        growth = (max_resolution / base_resolution) ** (1 / max(levels - 1, 1))
+        self.resolutions = [
+            int(np.floor(base_resolution * growth**level)) for level in range(levels)
+        ]
+        self.table_sizes = [
+            min(table_size, (resolution + 1) ** 3) for resolution in self.resolutions
+        ]
+        self.embeddings = nn.ParameterList(
+            nn.Parameter(
+                torch.empty(size, self.FEATURES_PER_LEVEL).uniform_(-1e-4, 1e-4)
+            )
+            for size in self.table_sizes
+        )
+
+        corners = [[(c >> axis) & 1 for axis in range(3)] for c in range(8)]
+        self.register_buffer("corners", torch.tensor(corners), persistent=False)
+
+    @property
+    def output_size(self) -> int:
+        return self.levels * self.FEATURES_PER_LEVEL
+
+    def config(self) -> dict:
+        """Describe the grid layout for the shader generator."""
+        return {
+            "levels": self.levels,
+            "table_size": self.table_size,
+            "base_resolution": self.base_resolution,
+            "max_resolution": self.max_resolution,
+            "resolutions": self.resolutions,
+            "table_sizes": self.table_sizes,
+        }
+
+    def vertex_index(self, level: int, vertices: torch.Tensor) -> torch.Tensor:
+        """Map integer vertex coordinates to rows of the level table."""
+        resolution = self.resolutions[level] + 1
+        table_size = self.table_sizes[level]
+        if resolution**3 <= table_size:
+            return vertices[..., 0] + resolution * (
+                vertices[..., 1] + resolution * vertices[..., 2]
+            )
+
+        # Hash on 32 bits, as GLSL uint arithmetic does
+        hashed = vertices[..., 0] * self.PRIMES[0]
+        for axis in (1, 2):
+            hashed = hashed ^ ((vertices[..., axis] * self.PRIMES[axis]) & 0xFFFFFFFF)
+        return hashed % table_size
+
+    def forward(self, x) -> torch.Tensor:
+        x = x.clamp(0.0, 1.0)
+        features = []
+        for level, embedding in enumerate(self.embeddings):
+            position = x * self.resolutions[level]
+            origin = position.floor().long().clamp(max=self.resolutions[level] - 1)
+            fraction = position - origin
+
+            # (batch, corner, axis)
+            vertices = origin.unsqueeze(1) + self.corners
+            weights = torch.where(
+                self.corners.bool(), fraction.unsqueeze(1), 1.0 - fraction.unsqueeze(1)
+            ).prod(dim=-1)
+
+            corner_features = embedding[self.vertex_index(level, vertices)]
+            features.append((weights.unsqueeze(-1) * corner_features).sum(dim=1))
+
+        return torch.cat(features, dim=-1)
+
+
 class TinyVideoNet(nn.Module):
     """Tiny neural network for video compression."""
 
-    def __init__(self, hidden_sizes: list[int] = [32, 64, 32]):
+    def __init__(
+        self,
+        hidden_sizes: list[int] = [32, 64, 32],
+        encoding: HashGridEncoding | None = None,
+        channels: int = 1,
+    ):
         """
         Args:
             hidden_sizes: List of hidden layer sizes
+            encoding: Optional input encoding trained jointly with the network
+            channels: Output channels (1 for grayscale, 3 for RGB), sharing
+                the hidden layers
         """
         super().__init__()
 
+        # Registered first so that its parameters come first when flattened
+        self.encoding = encoding
+
         layers = []
-        input_size = 3  # (frame, x, y)
+        input_size = 3 if encoding is None else encoding.output_size
 
         for hidden_size in hidden_sizes:
             layers.append(nn.Linear(input_size, hidden_size))
@@ -121,18 +333,111 @@ class TinyVideoNet(nn.Module):
             input_size = hidden_size
 
         # Output layer
-        layers.append(nn.Linear(input_size, 1))
+        layers.append(nn.Linear(input_size, channels))
         layers.append(nn.Sigmoid())  # Output in [0, 1]
 
         self.network = nn.Sequential(*layers)
         self.hidden_sizes = hidden_sizes
+        self.channels = channels
 
     def forward(self, x) -> torch.Tensor:
+        if self.encoding is not None:
+            x = self.encoding(x)
         return self.network(x)
 
     def count_parameters(self) -> int:
         return sum(p.numel() for p in self.parameters())
 
+    def count_macs(self) -> int:
+        """Multiply-adds of the network per evaluated pixel (fragment)."""
+        return sum(
+            layer.in_features * layer.out_features
+            for layer in self.network
+            if isinstance(layer, nn.Linear)
+        )
+
+
+def build_model(
+    metadata: dict, weights_dict: dict[str, np.ndarray] | None = None
+) -> TinyVideoNet:
+    """Rebuild a TinyVideoNet from its metadata and saved weights."""
+    encoding = metadata.get("encoding")
+    if encoding:
+        encoding = HashGridEncoding(
+            levels=encoding["levels"],
+            table_size=encoding["table_size"],
+            base_resolution=encoding["base_resolution"],
+            max_resolution=encoding["max_resolution"],
+        )
+
+    model = TinyVideoNet(
+        hidden_sizes=metadata.get("hidden_sizes", [32, 64, 32]),
+        encoding=encoding,
+        channels=metadata.get("channels", 1),
+    )
+    if weights_dict is not None:
+        model.load_state_dict(
+            {
+                key: torch.tensor(np.asarray(value), dtype=torch.float32)
+                for key, value in weights_dict.items()
+                if not key.startswith(TILE_PREFIX)
+            }
+        )
+    return model
+
+
+def build_tile_classifier(
+    metadata: dict, weights_dict: dict[str, np.ndarray] | None = None
+) -> TinyVideoNet | None:
+    """Rebuild the early-exit tile classifier, if the model has one."""
+    early_exit = metadata.get("early_exit")
+    if not early_exit:
+        return None
+
+    # Two outputs: probability of a solid black and of a solid white tile
+    classifier = TinyVideoNet(hidden_sizes=early_exit["hidden_sizes"], channels=2)
+    if weights_dict is not None:
+        classifier.load_state_dict(
+            {
+                key.removeprefix(TILE_PREFIX): torch.tensor(
+                    np.asarray(value), dtype=torch.float32
+                )
+                for key, value in weights_dict.items()
+                if key.startswith(TILE_PREFIX)
+            }
+        )
+    return classifier
+
+
+def fake_quantize(param: torch.Tensor, quantization: str) -> torch.Tensor:
+    """Round weights the way the shaders store them, with straight-through
+    gradients.
+
+    - affine: stored as w * 0.5 + 0.5 in a half float buffer (the weights
+      are kept in [-1, 1] by `train_model`)
+    - fp16: stored as half floats
+    - int8: symmetric per-tensor scale, INT8_LEVELS levels on each side
+    """
+    if quantization == "affine":
+        stored = (param.clamp(-1.0, 1.0) * 0.5 + 0.5).half().float()
+        quantized = stored * 2.0 - 1.0
+    elif quantization == "fp16":
+        quantized = param.half().float()
+    elif quantization == "int8":
+        scale = param.detach().abs().max().clamp(min=1e-8) / INT8_LEVELS
+        quantized = (param / scale).round().clamp(-INT8_LEVELS, INT8_LEVELS) * scale
+    else:
+        raise ValueError(f"Unknown quantization: {quantization}")
+
+    return param + (quantized - param).detach()
+
+
+def range_penalty(model: nn.Module) -> torch.Tensor:
+    """Squared excess of the weights over the [-1, 1] packing range."""
+    return sum(
+        (param.abs() - 1.0).clamp(min=0.0).pow(2).sum() for param in model.parameters()
+    )
+
 
 def train_model(
     model: nn.Module,
@@ -140,48 +445,122 @@ def train_model(
     epochs: int = 10,
     lr: float = 0.001,
     device: str = "cpu",
+    teacher: nn.Module | None = None,
+    distill_weight: float = 0.5,
+    quantization: str | None = None,
+    range_weight: float = 0.0,
 ) -> nn.Module:
+    """Train the model.
+
+    If a teacher model is given, the loss mixes the error against the
+    targets with the error against the teacher predictions (distillation),
+    `distill_weight` being the weight of the latter.
+
+    With a quantization (one of QUANTIZATIONS), the forward pass uses the
+    weights as the shaders will store them (quantization-aware training).
+    With the affine one, the weights are also projected back to [-1, 1] after
+    each step, as Buffer A does not clamp them.
+    `range_weight` scales a penalty on the weights outside of [-1, 1].
+
+    If a `torch.distributed` process group is initialized, the model is
+    wrapped in `DistributedDataParallel` and each rank is expected to iterate
+    over its own shard of the data. The unwrapped model is returned, so its
+    parameter names are the same as in single-process training.
+    """
     model = model.to(device)
-    criterion = nn.MSELoss()
-    optimizer = optim.Adam(model.parameters(), lr=lr)
+    distributed = dist.is_available() and dist.is_initialized()
+    is_main = not distributed or dist.get_rank() == 0
+    ddp_model = DistributedDataParallel(model) if distributed else model
 
-    print(f"\nTraining on {device}...")
-    print(f"Parameters: {model.count_parameters():,}")
-    print(f"Epochs: {epochs}, Learning rate: {lr}")
+    criterion = nn.MSELoss()
+    optimizer = optim.Adam(ddp_model.parameters(), lr=lr)
+    if teacher is not None:
+        teacher = teacher.to(device).eval()
+    if quantization is not None and quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unknown quantization: {quantization}")
+
+    if is_main:
+        print(f"\nTraining on {device}...")
+        if distributed:
+            print(f"Data-parallel ranks: {dist.get_world_size()}")
+        print(f"Parameters: {model.count_parameters():,}")
+        print(f"Epochs: {epochs}, Learning rate: {lr}")
+        if quantization is not None:
+            print(f"Quantization-aware training: {quantization}")
 
     for epoch in range(epochs):
-        model.train()
+        ddp_model.train()
         total_loss = 0
 
-        pbar = tqdm(train_loader, desc=f"Epoch {epoch + 1}/{epochs}")
+        pbar = tqdm(
+            train_loader, desc=f"Epoch {epoch + 1}/{epochs}", disable=not is_main
+        )
         for batch_x, batch_y in pbar:
             batch_x = batch_x.to(device)
             batch_y = batch_y.to(device)
 
             # Forward pass
-            predictions = model(batch_x)
+            if quantization is None:
+                predictions = ddp_model(batch_x)
+            else:
+                quantized = {
+                    name: fake_quantize(param, quantization)
+                    for name, param in ddp_model.named_parameters()
+                }
+                predictions = functional_call(ddp_model, quantized, (batch_x,))
             loss = criterion(predictions, batch_y)
+            if teacher is not None:
+                with torch.no_grad():
+                    teacher_predictions = teacher(batch_x)
+                loss = (1 - distill_weight) * loss + distill_weight * criterion(
+                    predictions, teacher_predictions
+                )
+            if range_weight > 0.0:
+                loss = loss + range_weight * range_penalty(model)
 
             # Backward pass
             optimizer.zero_grad()
             loss.backward()
             optimizer.step()
+            if quantization == "affine":
+                with torch.no_grad():
+                    for param in model.parameters():
+                        param.clamp_(-1.0, 1.0)
 
             total_loss += loss.item()
             pbar.set_postfix({"loss": f"{loss.item():.6f}"})
 
         avg_loss = total_loss / len(train_loader)
-        print(f"Epoch {epoch + 1}/{epochs} - Average Loss: {avg_loss:.6f}")
+        if distributed:
+            # Report the loss averaged over all ranks
+            loss_tensor = torch.tensor([avg_loss], device=device)
+            dist.all_reduce(loss_tensor)
+            avg_loss = loss_tensor.item() / dist.get_world_size()
+        if is_main:
+            print(f"Epoch {epoch + 1}/{epochs} - Average Loss: {avg_loss:.6f}")
 
     return model
 
 
-def save_model_weights(model: nn.Module, output_path: Path):
+def model_parameters(
+    model: nn.Module, tile_classifier: nn.Module | None = None
+) -> dict[str, torch.Tensor]:
+    """Parameters to save, the tile classifier ones prefixed by TILE_PREFIX."""
+    parameters = dict(model.named_parameters())
+    if tile_classifier is not None:
+        for name, param in tile_classifier.named_parameters():
+            parameters[TILE_PREFIX + name] = param
+    return parameters
+
+
+def save_model_weights(
+    model: nn.Module, output_path: Path, tile_classifier: nn.Module | None = None
+):
     """Save model weights as JSON for easy shader integration."""
     weights_dict = {}
 
     layer_idx = 0
-    for name, param in model.named_parameters():
+    for name, param in model_parameters(model, tile_classifier).items():
         weights_dict[name] = param.detach().cpu().numpy().tolist()
         layer_idx += 1
 
@@ -196,7 +575,7 @@ def save_model_weights(model: nn.Module, output_path: Path):
     print(f"Weights saved to: {numpy_path}")
 
     # Calculate total size
-    total_params = model.count_parameters()
+    total_params = sum(np.size(value) for value in weights_dict.values())
     size_bytes = total_params * 4  # float32
     print(f"Total parameters: {total_params:,}")
     print(f"Size: {size_bytes:,} bytes = {size_bytes / 1024:.2f} KB")
@@ -204,20 +583,37 @@ def save_model_weights(model: nn.Module, output_path: Path):
     return weights_dict
 
 
-def evaluate_model(
+def save_model_bundle(
     model: nn.Module,
+    metadata: dict,
+    output_path: Path,
+    tile_classifier: nn.Module | None = None,
+):
+    """Save model weights and metadata as a single binary bundle."""
+    weights_dict = {
+        name: param.detach().cpu().numpy().astype(np.float32)
+        for name, param in model_parameters(model, tile_classifier).items()
+    }
+    save_bundle(output_path, weights_dict, metadata)
+    print(f"\nModel bundle saved to: {output_path}")
+
+    # Calculate total size
+    total_params = sum(value.size for value in weights_dict.values())
+    size_bytes = output_path.stat().st_size
+    print(f"Total parameters: {total_params:,}")
+    print(f"Size: {size_bytes:,} bytes = {size_bytes / 1024:.2f} KB")
+
+    return weights_dict
+
+
+def sample_pixels(
     df: pl.DataFrame,
     width: int,
     height: int,
     total_frames: int,
-    device: str = "cpu",
     num_samples: int = 10000,
-) -> None:
-    """Evaluate model on random samples."""
-    model.eval()
-    model = model.to(device)
-
-    # Sample random pixels
+) -> tuple[torch.Tensor, torch.Tensor]:
+    """Draw random normalized (inputs, targets) pairs from the pixel data."""
     sample_df = df.sample(n=min(num_samples, len(df)), shuffle=True, seed=42)
 
     frames = (
@@ -226,13 +622,48 @@ def evaluate_model(
     xs = sample_df.select("x").to_numpy().flatten().astype(np.float32) / width
     ys = sample_df.select("y").to_numpy().flatten().astype(np.float32) / height
     pixels = (
-        sample_df.select("pixel_value").to_numpy().flatten().astype(np.float32) / 255.0
+        sample_df.select(pixel_columns(sample_df)).to_numpy().astype(np.float32) / 255.0
     )
 
-    inputs = torch.tensor(np.stack([frames, xs, ys], axis=1), dtype=torch.float32).to(
-        device
+    inputs = torch.tensor(np.stack([frames, xs, ys], axis=1), dtype=torch.float32)
+    targets = torch.tensor(pixels, dtype=torch.float32)
+    return inputs, targets
+
+
+def tile_ranges(df: pl.DataFrame, tile_size: int) -> pl.DataFrame:
+    """Darkest and brightest channel value of each tile of each frame."""
+    columns = pixel_columns(df)
+    return (
+        df.with_columns(
+            (pl.col("x") // tile_size).alias("tile_x"),
+            (pl.col("y") // tile_size).alias("tile_y"),
+        )
+        .group_by("frame", "tile_x", "tile_y")
+        .agg(
+            pl.max_horizontal(columns).max().alias("max"),
+            pl.min_horizontal(columns).min().alias("min"),
+        )
+        .sort("frame", "tile_y", "tile_x")
     )
-    targets = torch.tensor(pixels, dtype=torch.float32).unsqueeze(1).to(device)
+
+
+def evaluate_model(
+    model: nn.Module,
+    df: pl.DataFrame,
+    width: int,
+    height: int,
+    total_frames: int,
+    device: str = "cpu",
+    num_samples: int = 10000,
+) -> float:
+    """Evaluate model on random samples, returns the PSNR."""
+    model.eval()
+    model = model.to(device)
+
+    # Sample random pixels
+    inputs, targets = sample_pixels(df, width, height, total_frames, num_samples)
+    inputs = inputs.to(device)
+    targets = targets.to(device)
 
     with torch.no_grad():
         predictions = model(inputs)
@@ -247,3 +678,100 @@ def evaluate_model(
     print(f"MAE: {mae:.6f}")
     print(f"PSNR: {psnr:.2f} dB")
     print(f"Avg pixel error: {mae * 255:.2f} / 255")
+
+    return psnr
+
+
+def neuron_importance(
+    model: TinyVideoNet, layer: int, inputs: torch.Tensor
+) -> torch.Tensor:
+    """Importance of each neuron of a hidden layer.
+
+    The importance of a neuron is its mean absolute activation over the
+    inputs times the norm of its outgoing weights, i.e. how much it moves
+    the next layer.
+    """
+    linears = [module for module in model.network if isinstance(module, nn.Linear)]
+    # Each hidden layer is a (Linear, ReLU) pair
+    truncated = model.network[: 2 * (layer + 1)]
+
+    model.eval()
+    with torch.no_grad():
+        x = inputs.to(linears[0].weight.device)
+        if model.encoding is not None:
+            x = model.encoding(x)
+        activations = truncated(x).abs().mean(dim=0)
+        outgoing = linears[layer + 1].weight.norm(dim=0)
+
+    return activations * outgoing
+
+
+def prune_hidden_layer(
+    model: TinyVideoNet, layer: int, keep: int, inputs: torch.Tensor
+) -> TinyVideoNet:
+    """Return a copy of the model keeping the `keep` most important neurons
+    of a hidden layer."""
+    importance = neuron_importance(model, layer, inputs)
+    kept = importance.topk(keep).indices.sort().values
+
+    pruned = copy.deepcopy(model)
+    linears = [module for module in pruned.network if isinstance(module, nn.Linear)]
+    current, following = linears[layer], linears[layer + 1]
+
+    # Drop the rows (outputs) of the layer and the matching next-layer columns
+    current.weight = nn.Parameter(current.weight.detach()[kept].clone())
+    current.bias = nn.Parameter(current.bias.detach()[kept].clone())
+    current.out_features = keep
+    following.weight = nn.Parameter(following.weight.detach()[:, kept].clone())
+    following.in_features = keep
+
+    pruned.hidden_sizes = list(model.hidden_sizes)
+    pruned.hidden_sizes[layer] = keep
+    return pruned
+
+
+def compress_model(
+    model: TinyVideoNet,
+    train_loader: DataLoader,
+    inputs: torch.Tensor,
+    keep_ratio: float = 0.5,
+    epochs: int = 3,
+    lr: float = 0.001,
+    device: str = "cpu",
+    **train_kwargs,
+) -> TinyVideoNet:
+    """Structured pruning of the hidden layers followed by distillation.
+
+    Layer by layer, the least important neurons are removed and the pruned
+    network is fine-tuned against both the targets and the predictions of the
+    original model.
+
+    Args:
+        model: Trained model, used as the teacher
+        train_loader: Training data for the fine-tuning
+        inputs: Sample of network inputs used to rank the neurons
+        keep_ratio: Fraction of the neurons kept in each hidden layer
+        epochs: Fine-tuning epochs after pruning each layer
+        train_kwargs: Extra arguments of the fine-tuning `train_model` calls
+    """
+    teacher = copy.deepcopy(model).eval()
+    student = model
+    for layer, hidden_size in enumerate(model.hidden_sizes):
+        keep = max(1, round(hidden_size * keep_ratio))
+        if keep == hidden_size:
+            continue
+
+        if not dist.is_initialized() or dist.get_rank() == 0:
+            print(f"\nPruning hidden layer {layer}: {hidden_size} -> {keep} neurons")
+        student = prune_hidden_layer(student, layer, keep, inputs)
+        student = train_model(
+            student,
+            train_loader,
+            epochs=epochs,
+            lr=lr,
+            device=device,
+            teacher=teacher,
+            **train_kwargs,
+        )
+
+    return student
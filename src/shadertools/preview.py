@@ -0,0 +1,318 @@
+# ANTI-CAPITALIST SOFTWARE LICENSE (v 1.4)
+#
+# Copyright © 2026 Jonathan Tremesayques
+#
+# This is anti-capitalist software, released for free use by individuals and
+# organizations that do not operate by capitalist principles.
+#
+# Permission is hereby granted, free of charge, to any person or organization
+# (the "User") obtaining a copy of this software and associated documentation
+# files (the "Software"), to use, copy, modify, merge, distribute, and/or sell
+# copies of the Software, subject to the following conditions:
+#
+#   1. The above copyright notice and this permission notice shall be included
+#      in all copies or modified versions of the Software.
+#
+#   2. The User is one of the following:
+#     a. An individual person, laboring for themselves
+#     b. A non-profit organization
+#     c. An educational institution
+#     d. An organization that seeks shared profit for all of its members, and
+#        allows non-members to set the cost of their labor
+#
+#   3. If the User is an organization with owners, then all owners are workers
+#     and all workers are owners with equal equity and/or equal vote.
+#
+#   4. If the User is an organization, then the User is not law enforcement or
+#      military, or working for or under either.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT EXPRESS OR IMPLIED WARRANTY OF ANY
+# KIND, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF
+# CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import numpy as np
+import polars as pl
+import torch
+import torch.nn as nn
+
+from shadertools.shader import EDGE_SIGMA, TILE_CONFIDENCE, reduced_resolution
+from shadertools.video import pixel_columns
+
+
+def render_frame(
+    model: nn.Module,
+    frame: int,
+    width: int,
+    height: int,
+    total_frames: int,
+    scale: float = 1.0,
+    device: str = "cpu",
+) -> np.ndarray:
+    """Evaluate the network on a frame the way the shader does.
+
+    At scale 1 the network runs on every video pixel, like the Image pass.
+    Below 1 it runs on the centers of the reduced grid, like Buffer B.
+
+    Returns:
+        Array of shape (rows, columns, channels) with values in [0, 1]
+    """
+    if scale < 1.0:
+        low_width, low_height = reduced_resolution(width, height, scale)
+        xs = (np.arange(low_width) + 0.5) * width / low_width - 0.5
+        ys = (np.arange(low_height) + 0.5) * height / low_height - 0.5
+    else:
+        xs = np.arange(width, dtype=np.float64)
+        ys = np.arange(height, dtype=np.float64)
+
+    grid_y, grid_x = np.meshgrid(ys, xs, indexing="ij")
+    inputs = np.stack(
+        [
+            np.full(grid_x.size, frame / total_frames),
+            grid_x.ravel() / width,
+            grid_y.ravel() / height,
+        ],
+        axis=1,
+    )
+
+    model.eval()
+    model = model.to(device)
+    with torch.no_grad():
+        output = model(torch.tensor(inputs, dtype=torch.float32, device=device))
+
+    return output.cpu().numpy().reshape(*grid_x.shape, -1)
+
+
+def upscale(
+    low: np.ndarray, width: int, height: int, upscale_filter: str = "bilinear"
+) -> np.ndarray:
+    """Upsample a reduced-resolution frame the way the Image pass does."""
+    low_height, low_width, _ = low.shape
+
+    def sample_positions(size: int, low_size: int):
+        position = (np.arange(size) + 0.5) * low_size / size - 0.5
+        origin = np.floor(position).astype(int)
+        fraction = position - origin
+        return (
+            np.clip(origin, 0, low_size - 1),
+            np.clip(origin + 1, 0, low_size - 1),
+            fraction,
+        )
+
+    x0, x1, fx = sample_positions(width, low_width)
+    y0, y1, fy = sample_positions(height, low_height)
+
+    # Taps (rows, columns, channels) and bilinear weights (rows, columns, 1)
+    fx = fx[None, :, None]
+    fy = fy[:, None, None]
+    taps = [low[y0][:, x0], low[y0][:, x1], low[y1][:, x0], low[y1][:, x1]]
+    weights = [(1 - fx) * (1 - fy), fx * (1 - fy), (1 - fx) * fy, fx * fy]
+
+    if upscale_filter == "edge":
+        # Scale the weights by the similarity of each tap to the nearest one
+        nearest = np.select(
+            [(fx < 0.5) & (fy < 0.5), fy < 0.5, fx < 0.5],
+            taps[:3],
+            taps[3],
+        )
+        weights = [
+            weight
+            * np.exp(
+                -np.sum((tap - nearest) ** 2, axis=-1, keepdims=True)
+                / (2 * EDGE_SIGMA**2)
+            )
+            for tap, weight in zip(taps, weights)
+        ]
+
+    image = sum(tap * weight for tap, weight in zip(taps, weights))
+    image /= sum(weights)
+
+    return image
+
+
+def frame_pixels(df: pl.DataFrame, frame: int, width: int, height: int) -> np.ndarray:
+    """Ground truth of a frame, normalized to [0, 1].
+
+    Returns:
+        Array of shape (rows, columns, channels)
+    """
+    columns = pixel_columns(df)
+    pixels = df.filter(pl.col("frame") == frame)
+    image = np.zeros((height, width, len(columns)), dtype=np.float32)
+    image[pixels["y"].to_numpy(), pixels["x"].to_numpy()] = (
+        pixels.select(columns).to_numpy() / 255.0
+    )
+    return image
+
+
+def psnr(a: np.ndarray, b: np.ndarray) -> float:
+    """PSNR between two images with values in [0, 1]."""
+    mse = np.mean((a - b) ** 2)
+    return 10 * np.log10(1.0 / mse) if mse > 0 else float("inf")
+
+
+def preview_downscaled(
+    model: nn.Module,
+    df: pl.DataFrame,
+    width: int,
+    height: int,
+    total_frames: int,
+    frames: list[int],
+    scale: float = 0.5,
+    upscale_filter: str = "bilinear",
+    device: str = "cpu",
+) -> dict[str, float]:
+    """Measure the quality loss of the reduced-resolution inference pass.
+
+    Returns:
+        Mean PSNR over the frames of the full-resolution output and of the
+        upscaled output against the ground truth, and of the upscaled output
+        against the full-resolution one
+    """
+    full_psnrs, scaled_psnrs, relative_psnrs = [], [], []
+    for frame in frames:
+        truth = frame_pixels(df, frame, width, height)
+        full = render_frame(model, frame, width, height, total_frames, device=device)
+        low = render_frame(
+            model, frame, width, height, total_frames, scale=scale, device=device
+        )
+        scaled = upscale(low, width, height, upscale_filter)
+
+        full_psnrs.append(psnr(full, truth))
+        scaled_psnrs.append(psnr(scaled, truth))
+        relative_psnrs.append(psnr(scaled, full))
+
+    low_width, low_height = reduced_resolution(width, height, scale)
+    results = {
+        "full_psnr": float(np.mean(full_psnrs)),
+        "scaled_psnr": float(np.mean(scaled_psnrs)),
+        "scaled_vs_full_psnr": float(np.mean(relative_psnrs)),
+        "speedup": (width * height) / (low_width * low_height),
+    }
+
+    print(f"\nPreview on {len(frames)} frames:")
+    print(f"Full resolution ({width}×{height}): {results['full_psnr']:.2f} dB")
+    print(
+        f"Scaled ({low_width}×{low_height}, {upscale_filter}): "
+        f"{results['scaled_psnr']:.2f} dB "
+        f"({results['scaled_psnr'] - results['full_psnr']:+.2f} dB)"
+    )
+    print(f"Scaled vs full resolution: {results['scaled_vs_full_psnr']:.2f} dB")
+    print(f"Network evaluations: {results['speedup']:.1f}x fewer")
+
+    return results
+
+
+def solid_tiles(
+    classifier: nn.Module,
+    frame: int,
+    width: int,
+    height: int,
+    total_frames: int,
+    tile_size: int,
+    confidence: float = TILE_CONFIDENCE,
+    device: str = "cpu",
+) -> tuple[np.ndarray, np.ndarray]:
+    """Classify the tiles of a frame the way the shaders do.
+
+    Returns:
+        Per-pixel arrays of shape (rows, columns): whether the pixel's tile
+        is output as solid, and its constant value (0 or 1)
+    """
+    tile_xs = (np.arange(width) // tile_size + 0.5) * tile_size
+    tile_ys = (np.arange(height) // tile_size + 0.5) * tile_size
+    centers_x = np.unique(tile_xs)
+    centers_y = np.unique(tile_ys)
+
+    grid_y, grid_x = np.meshgrid(centers_y, centers_x, indexing="ij")
+    inputs = np.stack(
+        [
+            np.full(grid_x.size, frame / total_frames),
+            grid_x.ravel() / width,
+            grid_y.ravel() / height,
+        ],
+        axis=1,
+    )
+
+    classifier.eval()
+    classifier = classifier.to(device)
+    with torch.no_grad():
+        solid = classifier(torch.tensor(inputs, dtype=torch.float32, device=device))
+    solid = solid.cpu().numpy().reshape(*grid_x.shape, 2)
+
+    # Tile of each pixel
+    rows = np.searchsorted(centers_y, tile_ys)[:, None]
+    columns = np.searchsorted(centers_x, tile_xs)[None, :]
+    solid = solid[rows, columns]
+    return solid.max(axis=-1) > confidence, (solid[..., 1] > solid[..., 0]) * 1.0
+
+
+def simulate_early_exit(
+    model: nn.Module,
+    classifier: nn.Module,
+    df: pl.DataFrame,
+    width: int,
+    height: int,
+    total_frames: int,
+    frames: list[int],
+    tile_size: int,
+    confidence: float = TILE_CONFIDENCE,
+    device: str = "cpu",
+) -> dict[str, float]:
+    """Measure the fragments skipped by the early-exit tile classifier.
+
+    Returns:
+        Fraction of the fragments skipped, mean PSNR against the ground truth
+        of the full network output and of the early-exit output, and of the
+        latter against the former, and average multiply-adds per fragment
+        with and without early exit
+    """
+    skipped, full_psnrs, exit_psnrs, relative_psnrs = [], [], [], []
+    for frame in frames:
+        truth = frame_pixels(df, frame, width, height)
+        full = render_frame(model, frame, width, height, total_frames, device=device)
+        solid, value = solid_tiles(
+            classifier,
+            frame,
+            width,
+            height,
+            total_frames,
+            tile_size,
+            confidence,
+            device=device,
+        )
+        output = np.where(solid[..., None], value[..., None], full)
+
+        skipped.append(solid.mean())
+        full_psnrs.append(psnr(full, truth))
+        exit_psnrs.append(psnr(output, truth))
+        relative_psnrs.append(psnr(output, full))
+
+    results = {
+        "skipped_fraction": float(np.mean(skipped)),
+        "full_psnr": float(np.mean(full_psnrs)),
+        "early_exit_psnr": float(np.mean(exit_psnrs)),
+        "early_exit_vs_full_psnr": float(np.mean(relative_psnrs)),
+        "full_macs": model.count_macs(),
+    }
+    # Every fragment runs the classifier, the others the network too
+    results["early_exit_macs"] = (
+        classifier.count_macs()
+        + (1 - results["skipped_fraction"]) * results["full_macs"]
+    )
+
+    print(f"\nEarly exit on {len(frames)} frames ({tile_size}×{tile_size} tiles):")
+    print(f"Fragments skipped: {results['skipped_fraction'] * 100:.1f}%")
+    print(f"Full network: {results['full_psnr']:.2f} dB")
+    print(
+        f"Early exit: {results['early_exit_psnr']:.2f} dB "
+        f"({results['early_exit_psnr'] - results['full_psnr']:+.2f} dB)"
+    )
+    print(f"Early exit vs full network: {results['early_exit_vs_full_psnr']:.2f} dB")
+    print(
+        f"Multiply-adds per fragment: {results['full_macs']:,} -> "
+        f"{results['early_exit_macs']:,.0f}"
+    )
+
+    return results
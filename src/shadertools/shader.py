@@ -38,64 +38,255 @@ from pathlib import Path
 import numpy as np
 from jinja2 import Environment, PackageLoader
 
+from shadertools.bundle import SUFFIX, load_bundle, read_header, texture_size
+from shadertools.cost import check_budget, estimate_frame_cost, network_cost
+
 env = Environment(loader=PackageLoader("shadertools"))
 
+# Filters available to upsample a reduced-resolution inference pass
+UPSCALE_FILTERS = ("bilinear", "edge")
+# Color distance scale of the tap similarity of the edge-aware filter
+EDGE_SIGMA = 0.25
+
+# Shadertoy buffers the weights are sharded across, in iChannel order
+BUFFERS = ("a", "b", "c", "d")
+# Code size limit of a Shadertoy pass, in characters
+CODE_LIMIT = 65000
+
+# Storage formats of the weights in the weight buffers
+QUANTIZATIONS = ("affine", "fp16", "int8")
+# Quantization levels on each side of zero of the int8 format
+INT8_LEVELS = 127
+
+# Parameter name prefix of the early-exit tile classifier in saved weights
+TILE_PREFIX = "tiles."
+# Default tile size of the early-exit classifier, in video pixels
+TILE_SIZE = 16
+# Classifier probability above which a tile is output as solid
+TILE_CONFIDENCE = 0.9
+
 
 def load_weights(weights_path):
-    """Load NN weights from npz file."""
+    """Load NN weights from a bundle (memory-mapped), npz or JSON file."""
+    weights_path = Path(weights_path)
+    if weights_path.suffix == SUFFIX:
+        weights, _ = load_bundle(weights_path)
+        return weights
+
+    if weights_path.suffix == ".json":
+        with open(weights_path, "r") as f:
+            return {key: np.array(value) for key, value in json.load(f).items()}
+
     data = np.load(weights_path)
     weights = {key: data[key] for key in data.files}
     return weights
 
 
-def generate_buffer_a(weights_dict, metadata):
-    """Generate Buffer A shader that encodes weights as a texture."""
+def load_metadata(weights_path: Path) -> dict:
+    """Load the metadata of a bundle, or the one saved next to the weights."""
+    if weights_path.suffix == SUFFIX:
+        header, _ = read_header(weights_path)
+        return header["metadata"]
+
+    metadata_path = weights_path.with_name(weights_path.stem + "_metadata.json")
+    try:
+        with open(metadata_path, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        print(f"Warning: Metadata not found at {metadata_path}")
+        return {}
+
+
+def reduced_resolution(width: int, height: int, scale: float) -> tuple[int, int]:
+    """Size of the grid the network is evaluated on at the given scale."""
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def quantize_weights(weights_dict, quantization="affine"):
+    """Weights in the storage format of the weight buffers.
+
+    Returns:
+        The flattened values written in the GLSL code (quantized integers for
+        int8) and, for int8, the scale of each tensor
+    """
+    values = []
+    scales = []
+    for param in weights_dict.values():
+        flat = np.asarray(param, dtype=np.float32).flatten()
+        if quantization == "fp16":
+            flat = flat.astype(np.float16)
+        elif quantization == "int8":
+            scale = max(float(np.abs(flat).max(initial=0.0)), 1e-8) / INT8_LEVELS
+            scale = np.float32(scale)
+            flat = np.clip(np.round(flat / scale), -INT8_LEVELS, INT8_LEVELS)
+            flat = flat.astype(np.int32)
+            scales.append(scale)
+        values.extend(flat)
+
+    return values, scales
+
+
+def weight_units(weights_dict):
+    """Tensors read together by the network code: the encoding tables, then
+    the weight and bias of each layer."""
+    units = {}
+    for key in weights_dict:
+        module, _ = key.rsplit(".", 1)
+        if key.startswith("encoding."):
+            module = "encoding"
+        units.setdefault(module, []).append(key)
+    return list(units.values())
+
+
+def shard_weights(weights_dict, num_shards):
+    """Split the weights into at most `num_shards` contiguous shards of whole
+    units (see `weight_units`), minimizing the size of the largest shard.
+
+    A layer is never split, so the network code reads each layer from a
+    single buffer without branching per weight.
+    """
+    units = weight_units(weights_dict)
+    sizes = [sum(int(weights_dict[key].size) for key in unit) for unit in units]
+
+    # The optimal largest shard is the sum of a run of units: take the
+    # smallest one a greedy fill reaches with few enough shards (no smaller
+    # than the largest unit, which must fit in a shard on its own)
+    capacities = sorted(
+        {
+            sum(sizes[i:j])
+            for i in range(len(sizes))
+            for j in range(i + 1, len(sizes) + 1)
+        }
+    )
+    capacities = [capacity for capacity in capacities if capacity >= max(sizes)]
+    for capacity in capacities:
+        shards = [[]]
+        shard_size = 0
+        for unit, size in zip(units, sizes):
+            if shards[-1] and shard_size + size > capacity:
+                shards.append([])
+                shard_size = 0
+            shards[-1].extend(unit)
+            shard_size += size
+        if len(shards) <= num_shards:
+            break
+
+    return [{key: weights_dict[key] for key in shard} for shard in shards]
+
+
+def generate_buffer_a(weights_dict, metadata, quantization="affine", buffer="a"):
+    """Generate a weight buffer shader that encodes weights as a texture."""
 
     # Linearize all weights
-    all_weights = []
     offsets = {}
     current_offset = 0
 
-    sorted_keys = sorted(weights_dict.keys())
-    for key in sorted_keys:
+    # Keep the order in which the parameters were saved (encoding tables
+    # first, then each layer's weight before its bias), which is the order
+    # the Image shader reads them in
+    for key in weights_dict:
         param = weights_dict[key]
-        flat = param.flatten()
-        all_weights.extend(flat)
         offsets[key] = {
             "offset": current_offset,
-            "size": len(flat),
+            "size": int(param.size),
             "shape": list(param.shape),
         }
-        current_offset += len(flat)
+        current_offset += int(param.size)
+
+    all_weights, scales = quantize_weights(weights_dict, quantization)
+    tensor_ends = [info["offset"] + info["size"] for info in offsets.values()]
 
     total_weights = len(all_weights)
-    print(f"Total weights: {total_weights:,}")
 
     # Calculate texture size needed
-    values_per_pixel = 4  # RGBA
-    num_pixels = (total_weights + values_per_pixel - 1) // values_per_pixel
-    tex_size = int(np.ceil(np.sqrt(num_pixels)))
+    tex_size = texture_size(total_weights)
 
     tpl = env.get_template("buffer_a.fs")
     return (
-        tpl.render(total_weights=total_weights, tex_size=tex_size, weights=all_weights),
+        tpl.render(
+            total_weights=total_weights,
+            tex_size=tex_size,
+            weights=all_weights,
+            quantization=quantization,
+            buffer=buffer,
+            scales=scales,
+            tensor_ends=tensor_ends,
+        ),
         offsets,
         tex_size,
     )
 
 
-def generate_image_shader(metadata, offsets, tex_size):
-    """Generate main Image shader that performs NN inference."""
+def generate_weight_buffers(
+    weights_dict, metadata, quantization="affine", max_buffers=len(BUFFERS)
+):
+    """Generate the weight buffer shaders, sharding the weights across as few
+    buffers as needed for each one to fit in CODE_LIMIT.
+
+    Returns:
+        The shader of each buffer, the layout map (offset, size, shape and
+        buffer channel of each tensor) and the texture size of each buffer
+
+    Raises:
+        ValueError: If a layer (or the encoding tables) does not fit in a
+            buffer on its own
+    """
+    for unit in weight_units(weights_dict):
+        code, _, _ = generate_buffer_a(
+            {key: weights_dict[key] for key in unit}, metadata, quantization
+        )
+        if len(code) > CODE_LIMIT:
+            raise ValueError(
+                f"{', '.join(unit)} alone takes {len(code):,} characters, more "
+                f"than a buffer holds ({CODE_LIMIT:,}): use a smaller layer or "
+                "a shorter quantization"
+            )
+
+    for num_buffers in range(1, max_buffers + 1):
+        buffers = [
+            generate_buffer_a(shard, metadata, quantization, buffer)
+            for buffer, shard in zip(BUFFERS, shard_weights(weights_dict, num_buffers))
+        ]
+        if all(len(code) <= CODE_LIMIT for code, _, _ in buffers):
+            break
+
+    layout = {}
+    for channel, (_, offsets, _) in enumerate(buffers):
+        for key, info in offsets.items():
+            layout[key] = {**info, "channel": channel}
+
+    return (
+        [code for code, _, _ in buffers],
+        layout,
+        [tex_size for _, _, tex_size in buffers],
+    )
+
+
+def network_context(metadata, layout, tex_sizes):
+    """Template variables of the NN inference code (network.fs)."""
 
     # Extract architecture info
     hidden_sizes = metadata.get("hidden_sizes", [32, 64, 32])
     width = metadata.get("width", 480)
     height = metadata.get("height", 360)
     total_frames = metadata.get("total_frames", 6572)
+    channels = metadata.get("channels", 1)
+    quantization = metadata.get("quantization", "affine")
+
+    # Input encoding: grid tables are read one RGBA texel per vertex
+    encoding = metadata.get("encoding")
+    grid_offsets = []
+    grid_channel = 0
+    if encoding:
+        for level in range(encoding["levels"]):
+            offset = layout[f"encoding.embeddings.{level}"]["offset"]
+            assert offset % 4 == 0, "grid tables must start on a texel boundary"
+            grid_offsets.append(offset // 4)
+        grid_channel = layout["encoding.embeddings.0"]["channel"]
 
     # Calculate layer info
     layer_info = []
-    input_size = 3
+    input_size = 3 if not encoding else encoding["levels"] * 4
     for i, hidden_size in enumerate(hidden_sizes):
         weight_size = input_size * hidden_size
         bias_size = hidden_size
@@ -106,46 +297,143 @@ def generate_image_shader(metadata, offsets, tex_size):
                 "output": hidden_size,
                 "weight_size": weight_size,
                 "bias_size": bias_size,
+                **layer_layout(layout, i),
             }
         )
         input_size = hidden_size
 
-    # Final layer
+    # Final layer: shared trunk to one output per channel
     layer_info.append(
         {
             "index": len(hidden_sizes),
             "input": input_size,
-            "output": 1,
-            "weight_size": input_size * 1,
-            "bias_size": 1,
+            "output": channels,
+            "weight_size": input_size * channels,
+            "bias_size": channels,
+            **layer_layout(layout, len(hidden_sizes)),
         }
     )
 
+    # Early-exit tile classifier: raw inputs to solid black / white
+    early_exit = metadata.get("early_exit")
+    tile_layer_info = []
+    if early_exit:
+        input_size = 3
+        for i, output_size in enumerate(early_exit["hidden_sizes"] + [2]):
+            tile_layer_info.append(
+                {
+                    "index": i,
+                    "input": input_size,
+                    "output": output_size,
+                    **layer_layout(layout, i, TILE_PREFIX + "network"),
+                }
+            )
+            input_size = output_size
+
+    return {
+        "width": width,
+        "height": height,
+        "total_frames": total_frames,
+        "tex_sizes": tex_sizes,
+        "buffers": BUFFERS,
+        "hidden_sizes": hidden_sizes,
+        "layer_info": layer_info,
+        "encoding": encoding,
+        "grid_offsets": grid_offsets,
+        "grid_channel": grid_channel,
+        "quantization": quantization,
+        "early_exit": early_exit,
+        "tile_layer_info": tile_layer_info,
+    }
+
+
+def layer_layout(layout, index, module="network"):
+    """Buffer channel and offsets of the weight and bias of a layer."""
+    # Linear layers alternate with their activations in `network`
+    weight = layout[f"{module}.{2 * index}.weight"]
+    bias = layout[f"{module}.{2 * index}.bias"]
+    assert weight["channel"] == bias["channel"], "layers must not be split"
+    return {
+        "channel": weight["channel"],
+        "weight_offset": weight["offset"],
+        "bias_offset": bias["offset"],
+    }
+
+
+def generate_image_shader(metadata, layout, tex_sizes):
+    """Generate main Image shader that performs NN inference."""
     tpl = env.get_template("image.fs")
+    return tpl.render(**network_context(metadata, layout, tex_sizes))
+
+
+def generate_buffer_b(metadata, layout, tex_sizes, scale):
+    """Generate the buffer shader that performs NN inference at reduced
+    resolution, in the buffer after the weight buffers."""
+    context = network_context(metadata, layout, tex_sizes)
+    low_width, low_height = reduced_resolution(
+        context["width"], context["height"], scale
+    )
+
+    tpl = env.get_template("buffer_b.fs")
+    return tpl.render(**context, low_width=low_width, low_height=low_height)
+
+
+def generate_upscale_shader(
+    metadata, scale, upscale_filter="bilinear", network_buffer="b"
+):
+    """Generate Image shader that upsamples the reduced-resolution output."""
+    width = metadata.get("width", 480)
+    height = metadata.get("height", 360)
+    low_width, low_height = reduced_resolution(width, height, scale)
+
+    tpl = env.get_template("image_upscale.fs")
     return tpl.render(
         width=width,
         height=height,
-        total_frames=total_frames,
-        tex_size=tex_size,
-        hidden_sizes=hidden_sizes,
-        layer_info=layer_info,
+        low_width=low_width,
+        low_height=low_height,
+        upscale_filter=upscale_filter,
+        edge_sigma=EDGE_SIGMA,
+        network_buffer=network_buffer,
     )
 
 
-def generate_multipass_shader(weights_path: Path, output_dir: Path):
-    """Generate complete multi-pass Shadertoy shader."""
+def generate_multipass_shader(
+    weights_path: Path,
+    output_dir: Path,
+    scale: float = 1.0,
+    upscale_filter: str = "bilinear",
+    max_cost: dict[str, float] | None = None,
+    quantization: str | None = None,
+):
+    """Generate complete multi-pass Shadertoy shader.
+
+    The weights are sharded across Buffers A-D, as few as fit in the code
+    size limit, and stored with the given quantization, by default the one the
+    model was trained for. Their layout map is saved next to the shaders.
+
+    With a scale below 1, the network runs in the buffer after the weight
+    buffers on a reduced grid and the Image pass upsamples its output with
+    the given filter.
+
+    The static cost estimate of the shaders is saved next to them. If
+    `max_cost` gives per-frame budgets by cost metric, CostBudgetExceeded is
+    raised when the estimate exceeds one of them.
+    """
+    if not 0.0 < scale <= 1.0:
+        raise ValueError(f"Scale must be in (0, 1], got {scale}")
+    if upscale_filter not in UPSCALE_FILTERS:
+        raise ValueError(f"Unknown upscale filter: {upscale_filter}")
 
     print(f"Loading weights from: {weights_path}")
     weights_dict = load_weights(weights_path)
 
     # Load metadata
-    metadata_path = weights_path.with_name(weights_path.stem + "_metadata.json")
-    try:
-        with open(metadata_path, "r") as f:
-            metadata = json.load(f)
-    except FileNotFoundError:
-        print(f"Warning: Metadata not found at {metadata_path}")
-        metadata = {}
+    metadata = load_metadata(weights_path)
+    if quantization is not None:
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization: {quantization}")
+        metadata = {**metadata, "quantization": quantization}
 
     print("\nWeight layers:")
     total_params = 0
@@ -158,35 +446,146 @@ def generate_multipass_shader(weights_path: Path, output_dir: Path):
     size_kb = total_params * 4 / 1024
     print(f"Size: {size_kb:.2f} KB")
 
-    # Generate shaders
-    print("\nGenerating Buffer A (weight storage)...")
-    buffer_a, offsets, tex_size = generate_buffer_a(weights_dict, metadata)
+    # Generate shaders, keeping a buffer for the reduced-resolution pass
+    quantization = metadata.get("quantization", "affine")
+    max_buffers = len(BUFFERS) - 1 if scale < 1.0 else len(BUFFERS)
+    print("\nGenerating weight buffers (weight storage)...")
+    weight_buffers, layout, tex_sizes = generate_weight_buffers(
+        weights_dict, metadata, quantization, max_buffers
+    )
+    buffer_names = [f"Buffer {buffer.upper()}" for buffer in BUFFERS]
+
+    # Every pass renders a full frame; the fragments outside the region it
+    # computes take an early return
+    width = metadata.get("width", 480)
+    height = metadata.get("height", 360)
+    shaders = {}
+    early_returns = {}
 
-    print("Generating Image shader (NN inference)...")
-    image_shader = generate_image_shader(metadata, offsets, tex_size)
+    for buffer, code, tex_size in zip(BUFFERS, weight_buffers, tex_sizes):
+        filename = f"shadertoy_buffer_{buffer}.fs"
+        print(f"Buffer {buffer.upper()}: {tex_size}×{tex_size} texture")
+        shaders[filename] = code
+        early_returns[filename] = width * height - min(tex_size, width) * min(
+            tex_size, height
+        )
+
+    print(
+        f"Weights: {len(layout)} tensors in {len(tex_sizes)} buffer(s) ({quantization})"
+    )
+    for key, info in layout.items():
+        print(
+            f"  {key}: {buffer_names[info['channel']]} "
+            f"[{info['offset']}:{info['offset'] + info['size']}]"
+        )
+
+    network_inputs = ", ".join(
+        f"iChannel{channel} = {buffer_names[channel]}"
+        for channel in range(len(tex_sizes))
+    )
+    if scale < 1.0:
+        low_width, low_height = reduced_resolution(width, height, scale)
+        network_buffer = BUFFERS[len(tex_sizes)]
+        filename = f"shadertoy_buffer_{network_buffer}.fs"
+        early_returns[filename] = width * height - low_width * low_height
+        print(
+            f"Generating Buffer {network_buffer.upper()} "
+            f"(NN inference at {low_width}×{low_height})..."
+        )
+        shaders[filename] = generate_buffer_b(metadata, layout, tex_sizes, scale)
+
+        print(f"Generating Image shader ({upscale_filter} upscaling)...")
+        shaders["shadertoy_image.fs"] = generate_upscale_shader(
+            metadata, scale, upscale_filter, network_buffer
+        )
+        wiring = (
+            f"Buffer {network_buffer.upper()} {network_inputs}, "
+            f"Image iChannel0 = Buffer {network_buffer.upper()}"
+        )
+    else:
+        print("Generating Image shader (NN inference)...")
+        shaders["shadertoy_image.fs"] = generate_image_shader(
+            metadata, layout, tex_sizes
+        )
+        wiring = f"Image {network_inputs}"
 
     # Save shaders to files
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    buffer_a_path = output_dir / "shadertoy_buffer_a.fs"
-    with open(buffer_a_path, "w") as f:
-        f.write(buffer_a)
-    print(f"\nSaved Buffer A: {buffer_a_path}")
-
-    image_path = output_dir / "shadertoy_image.fs"
-    with open(image_path, "w") as f:
-        f.write(image_shader)
-    print(f"Saved Image: {image_path}")
+    print()
+    paths = []
+    for filename, code in shaders.items():
+        path = output_dir / filename
+        with open(path, "w") as f:
+            f.write(code)
+        print(f"Saved {filename}: {path}")
+        paths.append(path)
 
     print(f"\n{'=' * 80}")
     print("✅ Multi-pass shader generation complete!")
     print(f"{'=' * 80}")
-    print(f"\nCode size: {len(buffer_a) + len(image_shader):,} characters")
-    print(f"Buffer A: {len(buffer_a):,} chars")
-    print(f"Image: {len(image_shader):,} chars")
+    print(f"\nCode size: {sum(len(code) for code in shaders.values()):,} characters")
+    for filename, code in shaders.items():
+        print(f"{filename}: {len(code):,} chars")
+
+    print(f"\nChannels: {wiring}")
 
-    if len(buffer_a) > 65000 or len(image_shader) > 65000:
+    if any(len(code) > CODE_LIMIT for code in shaders.values()):
         print("\n⚠️  WARNING: Code may exceed Shadertoy limits!")
         print("Consider using an even smaller architecture.")
 
-    return buffer_a_path, image_path
+    # Static cost estimate
+    context = network_context(metadata, layout, tex_sizes)
+    cost = estimate_frame_cost(
+        {filename: (code, width * height) for filename, code in shaders.items()},
+        early_returns,
+    )
+    cost["network"] = network_cost(context["layer_info"], context["encoding"])
+
+    print(f"\nEstimated cost per frame ({width}×{height}):")
+    for filename in shaders:
+        per_frame = cost[filename]["per_frame"]
+        returned = cost[filename]["early_returns"]
+        print(
+            f"{filename} ({cost[filename]['fragments']:,} fragments"
+            + (f", {returned:,} early returns" if returned else "")
+            + "): "
+            f"{per_frame['texel_fetches']:,} texelFetch, "
+            f"{per_frame['multiply_adds']:,} multiply-adds, "
+            f"{per_frame['transcendentals']:,} transcendentals"
+        )
+    total = cost["total"]["per_frame"]
+    print(
+        f"Total: {total['texel_fetches']:,} texelFetch, "
+        f"{total['multiply_adds']:,} multiply-adds, "
+        f"{total['transcendentals']:,} transcendentals"
+    )
+    print(
+        f"Network per fragment: {cost['network']['texel_fetches']:,} texelFetch, "
+        f"{cost['network']['multiply_adds']:,} multiply-adds"
+    )
+
+    layout_path = output_dir / "shadertoy_layout.json"
+    with open(layout_path, "w") as f:
+        json.dump(
+            {
+                "buffers": [
+                    {"name": buffer_names[channel], "texture_size": tex_size}
+                    for channel, tex_size in enumerate(tex_sizes)
+                ],
+                "tensors": layout,
+            },
+            f,
+            indent=2,
+        )
+    print(f"Saved weight layout: {layout_path}")
+
+    cost_path = output_dir / "shadertoy_cost.json"
+    with open(cost_path, "w") as f:
+        json.dump(cost, f, indent=2)
+    print(f"Saved cost estimate: {cost_path}")
+
+    if max_cost:
+        check_budget(cost, max_cost)
+
+    return paths
@@ -1,4 +1,4 @@
-// NN - Buffer A: Weight Storage
+// NN - Buffer {{ buffer | upper }}: Weight Storage
 // This buffer stores the neural network weights as a texture
 //
 // Generated by Shadertools
@@ -41,17 +41,55 @@
 const int TOTAL_WEIGHTS = {{ total_weights }};
 const int TEXTURE_SIZE = {{ tex_size }};
 
-// Neural network weights (embedded directly in code)
+{%- if quantization == "int8" %}
+const int NUM_TENSORS = {{ scales | length }};
+
+// Neural network weights (embedded directly in code), quantized to int8
+const int NN_WEIGHTS[{{ total_weights }}] = int[{{ total_weights }}](
+{%- for w in weights %}
+    {{ w }}{% if not loop.last %},{% endif %}
+{%- endfor %}
+);
+
+// End index and dequantization scale of each tensor
+const int TENSOR_ENDS[NUM_TENSORS] = int[NUM_TENSORS]({{ tensor_ends | join(", ") }});
+const float TENSOR_SCALES[NUM_TENSORS] = float[NUM_TENSORS]({{ scales | join(", ") }});
+
+float readWeight(int idx) {
+    float scale = TENSOR_SCALES[NUM_TENSORS - 1];
+    for (int t = 0; t < NUM_TENSORS; t++) {
+        if (idx < TENSOR_ENDS[t]) {
+            scale = TENSOR_SCALES[t];
+            break;
+        }
+    }
+    return float(NN_WEIGHTS[idx]) * scale;
+}
+{%- else %}
+
+// Neural network weights (embedded directly in code){% if quantization == "fp16" %}, rounded to fp16{% endif %}
 const float NN_WEIGHTS[{{ total_weights }}] = float[{{ total_weights }}](
 {%- for w in weights %}
     {{ w }}{% if not loop.last %},{% endif %}
 {%- endfor %}
 );
 
+float readWeight(int idx) {
+    return NN_WEIGHTS[idx];
+}
+{%- endif %}
+
 void mainImage(out vec4 fragColor, in vec2 fragCoord) {
     // Convert pixel coordinate to linear weight index
     int px = int(fragCoord.x);
     int py = int(fragCoord.y);
+
+    // Only the texture region is read by the network
+    if (px >= TEXTURE_SIZE || py >= TEXTURE_SIZE) {
+        fragColor = vec4(0.0);
+        return;
+    }
+
     int pixel_idx = py * TEXTURE_SIZE + px;
     int weight_idx = pixel_idx * 4;
     
@@ -60,9 +98,14 @@ void mainImage(out vec4 fragColor, in vec2 fragCoord) {
     for (int i = 0; i < 4; i++) {
         int idx = weight_idx + i;
         if (idx < TOTAL_WEIGHTS) {
+{%- if quantization == "affine" %}
             // Normalize to [0, 1] for storage
             // Assuming weights are roughly in [-1, 1] range
-            packed[i] = NN_WEIGHTS[idx] * 0.5 + 0.5;
+            packed[i] = readWeight(idx) * 0.5 + 0.5;
+{%- else %}
+            // Stored as is: the buffer is a float texture
+            packed[i] = readWeight(idx);
+{%- endif %}
         }
     }
     
@@ -0,0 +1,87 @@
+// NN - Buffer {{ buffers[tex_sizes | length] | upper }}: Reduced-Resolution Inference
+// Reads weights from {% for tex_size in tex_sizes %}Buffer {{ buffers[loop.index0] | upper }} (iChannel{{ loop.index0 }}){{ ", " if not loop.last }}{% endfor %}
+// and evaluates the network on a {{ low_width }}x{{ low_height }} grid, upsampled by the Image pass
+//
+// Generated by Shadertools
+// https://github.com/jtremesay/shadertools/
+//
+// ANTI-CAPITALIST SOFTWARE LICENSE (v 1.4)
+//
+// Copyright © 2026 Jonathan Tremesayques
+//
+// This is anti-capitalist software, released for free use by individuals and
+// organizations that do not operate by capitalist principles.
+//
+// Permission is hereby granted, free of charge, to any person or organization
+// (the "User") obtaining a copy of this software and associated documentation
+// files (the "Software"), to use, copy, modify, merge, distribute, and/or sell
+// copies of the Software, subject to the following conditions:
+//
+//   1. The above copyright notice and this permission notice shall be included
+//      in all copies or modified versions of the Software.
+//
+//   2. The User is one of the following:
+//     a. An individual person, laboring for themselves
+//     b. A non-profit organization
+//     c. An educational institution
+//     d. An organization that seeks shared profit for all of its members, and
+//        allows non-members to set the cost of their labor
+//
+//   3. If the User is an organization with owners, then all owners are workers
+//     and all workers are owners with equal equity and/or equal vote.
+//
+//   4. If the User is an organization, then the User is not law enforcement or
+//      military, or working for or under either.
+//
+// THE SOFTWARE IS PROVIDED "AS IS", WITHOUT EXPRESS OR IMPLIED WARRANTY OF ANY
+// KIND, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+// FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS BE
+// LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF
+// CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+// SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+const int VIDEO_WIDTH = {{ width }};
+const int VIDEO_HEIGHT = {{ height }};
+const int TOTAL_FRAMES = {{ total_frames }};
+const int LOW_WIDTH = {{ low_width }};
+const int LOW_HEIGHT = {{ low_height }};
+{% include "network.fs" %}
+
+void mainImage(out vec4 fragColor, in vec2 fragCoord) {
+    // Calculate current frame based on time (30 fps)
+    int frame = int(iTime * 30.0) % TOTAL_FRAMES;
+    
+    // Low resolution pixel, rows in video order (top to bottom)
+    int lx = int(fragCoord.x);
+    int ly = int(fragCoord.y);
+    
+    // Only the low resolution region runs the network
+    if (lx >= LOW_WIDTH || ly >= LOW_HEIGHT) {
+        fragColor = vec4(0.0);
+        return;
+    }
+    
+    // Video coordinates of the low resolution pixel center
+    vec2 scale = vec2(VIDEO_WIDTH, VIDEO_HEIGHT) / vec2(LOW_WIDTH, LOW_HEIGHT);
+    vec2 video = (vec2(lx, ly) + 0.5) * scale - 0.5;
+    
+    // Normalize inputs to [0, 1]
+    float frame_norm = float(frame) / float(TOTAL_FRAMES);
+    float x_norm = video.x / float(VIDEO_WIDTH);
+    float y_norm = video.y / float(VIDEO_HEIGHT);
+    
+    vec3 input_ = vec3(frame_norm, x_norm, y_norm);
+    {%- if early_exit %}
+    
+    // Solid tiles output their color without running the network
+    vec3 tile_color;
+    if (solidTile(frame_norm, ivec2(max(video, 0.0)), tile_color)) {
+        fragColor = vec4(tile_color, 1.0);
+        return;
+    }
+    {%- endif %}
+    
+    // Run neural network
+    vec3 color = neuralNetwork(input_);
+    
+    fragColor = vec4(color, 1.0);
+}
\ No newline at end of file
@@ -0,0 +1,116 @@
+// NN - Image: Upscaling
+// Reads the reduced-resolution network output from Buffer {{ network_buffer | upper }} (iChannel0) and
+// upsamples it to the video resolution ({{ upscale_filter }} filter)
+//
+// Generated by Shadertools
+// https://github.com/jtremesay/shadertools/
+//
+// ANTI-CAPITALIST SOFTWARE LICENSE (v 1.4)
+//
+// Copyright © 2026 Jonathan Tremesayques
+//
+// This is anti-capitalist software, released for free use by individuals and
+// organizations that do not operate by capitalist principles.
+//
+// Permission is hereby granted, free of charge, to any person or organization
+// (the "User") obtaining a copy of this software and associated documentation
+// files (the "Software"), to use, copy, modify, merge, distribute, and/or sell
+// copies of the Software, subject to the following conditions:
+//
+//   1. The above copyright notice and this permission notice shall be included
+//      in all copies or modified versions of the Software.
+//
+//   2. The User is one of the following:
+//     a. An individual person, laboring for themselves
+//     b. A non-profit organization
+//     c. An educational institution
+//     d. An organization that seeks shared profit for all of its members, and
+//        allows non-members to set the cost of their labor
+//
+//   3. If the User is an organization with owners, then all owners are workers
+//     and all workers are owners with equal equity and/or equal vote.
+//
+//   4. If the User is an organization, then the User is not law enforcement or
+//      military, or working for or under either.
+//
+// THE SOFTWARE IS PROVIDED "AS IS", WITHOUT EXPRESS OR IMPLIED WARRANTY OF ANY
+// KIND, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+// FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS BE
+// LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF
+// CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+// SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+const int VIDEO_WIDTH = {{ width }};
+const int VIDEO_HEIGHT = {{ height }};
+const int LOW_WIDTH = {{ low_width }};
+const int LOW_HEIGHT = {{ low_height }};
+{%- if upscale_filter == "edge" %}
+const float EDGE_SIGMA = {{ edge_sigma }};
+{%- endif %}
+
+// Read a low resolution pixel, clamped to the edges
+vec3 readLowRes(ivec2 p) {
+    p = clamp(p, ivec2(0), ivec2(LOW_WIDTH - 1, LOW_HEIGHT - 1));
+    return texelFetch(iChannel0, p, 0).rgb;
+}
+
+void mainImage(out vec4 fragColor, in vec2 fragCoord) {
+    // Get pixel coordinates
+    vec2 uv = fragCoord / iResolution.xy;
+    int px = int(uv.x * float(VIDEO_WIDTH));
+    int py = int((1.0 - uv.y) * float(VIDEO_HEIGHT));
+    
+    // Boundary check
+    if (px >= VIDEO_WIDTH || py >= VIDEO_HEIGHT) {
+        fragColor = vec4(0.0);
+        return;
+    }
+    
+    // Position in the low resolution grid
+    vec2 scale = vec2(LOW_WIDTH, LOW_HEIGHT) / vec2(VIDEO_WIDTH, VIDEO_HEIGHT);
+    vec2 position = (vec2(px, py) + 0.5) * scale - 0.5;
+    ivec2 origin = ivec2(floor(position));
+    vec2 fraction = position - vec2(origin);
+    
+    {%- if upscale_filter == "edge" %}
+    
+    // Edge-aware interpolation: the bilinear weight of each tap is scaled by
+    // its similarity to the nearest tap, so that edges stay sharp while
+    // smooth areas and anti-aliased grays are interpolated
+    vec3 taps[4] = vec3[4](
+        readLowRes(origin),
+        readLowRes(origin + ivec2(1, 0)),
+        readLowRes(origin + ivec2(0, 1)),
+        readLowRes(origin + ivec2(1, 1))
+    );
+    vec4 weights = vec4(
+        (1.0 - fraction.x) * (1.0 - fraction.y),
+        fraction.x * (1.0 - fraction.y),
+        (1.0 - fraction.x) * fraction.y,
+        fraction.x * fraction.y
+    );
+    vec3 nearest = taps[int(fraction.x >= 0.5) + 2 * int(fraction.y >= 0.5)];
+    vec3 color = vec3(0.0);
+    float total = 0.0;
+    for (int i = 0; i < 4; i++) {
+        vec3 difference = taps[i] - nearest;
+        float weight = weights[i] * exp(
+            -dot(difference, difference) / (2.0 * EDGE_SIGMA * EDGE_SIGMA)
+        );
+        color += weight * taps[i];
+        total += weight;
+    }
+    color /= total;
+    {%- else %}
+    
+    // Bilinear interpolation
+    vec3 top = mix(
+        readLowRes(origin), readLowRes(origin + ivec2(1, 0)), fraction.x
+    );
+    vec3 bottom = mix(
+        readLowRes(origin + ivec2(0, 1)), readLowRes(origin + ivec2(1, 1)), fraction.x
+    );
+    vec3 color = mix(top, bottom, fraction.y);
+    {%- endif %}
+    
+    fragColor = vec4(color, 1.0);
+}
\ No newline at end of file
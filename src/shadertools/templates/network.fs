@@ -0,0 +1,153 @@
+{#- Neural network inference (weights read from Buffers A-D on iChannel0-3),
+    included by the passes that evaluate the network. -#}
+{%- for tex_size in tex_sizes %}
+const int TEXTURE_SIZE{{ loop.index0 }} = {{ tex_size }};
+{%- endfor %}
+{% for tex_size in tex_sizes %}
+// Read texel from Buffer {{ buffers[loop.index0] | upper }} texture, denormalized from [0, 1] to [-1, 1]
+vec4 readTexel{{ loop.index0 }}(int pixel_idx) {
+    int tex_y = pixel_idx / TEXTURE_SIZE{{ loop.index0 }};
+    int tex_x = pixel_idx % TEXTURE_SIZE{{ loop.index0 }};
+    
+    vec4 pixel = texelFetch(iChannel{{ loop.index0 }}, ivec2(tex_x, tex_y), 0);
+{%- if quantization == "affine" %}
+    return pixel * 2.0 - 1.0;
+{%- else %}
+    return pixel;
+{%- endif %}
+}
+
+// Read weight from Buffer {{ buffers[loop.index0] | upper }} texture
+float readWeight{{ loop.index0 }}(int index) {
+    return readTexel{{ loop.index0 }}(index / 4)[index % 4];
+}
+{% endfor %}{% if encoding %}
+// Multi-resolution hash-grid encoding: {{ encoding["levels"] }} levels, 4 features per level
+const int GRID_LEVELS = {{ encoding["levels"] }};
+const int GRID_RESOLUTIONS[GRID_LEVELS] = int[GRID_LEVELS]({{ encoding["resolutions"]|join(", ") }});
+const int GRID_TABLE_SIZES[GRID_LEVELS] = int[GRID_LEVELS]({{ encoding["table_sizes"]|join(", ") }});
+const int GRID_OFFSETS[GRID_LEVELS] = int[GRID_LEVELS]({{ grid_offsets|join(", ") }});
+
+// Table row of a grid vertex: dense for coarse levels, hashed otherwise
+int gridIndex(int level, ivec3 vertex) {
+    int resolution = GRID_RESOLUTIONS[level] + 1;
+    int table_size = GRID_TABLE_SIZES[level];
+    if (resolution * resolution * resolution <= table_size) {
+        return vertex.x + resolution * (vertex.y + resolution * vertex.z);
+    }
+    uvec3 v = uvec3(vertex);
+    uint hashed = v.x ^ (v.y * 2654435761u) ^ (v.z * 805459861u);
+    return int(hashed % uint(table_size));
+}
+
+// Trilinear interpolation of the grid features around the input point
+void encode(vec3 input_, out float features[{{ layer_info[0]["input"] }}]) {
+    for (int level = 0; level < GRID_LEVELS; level++) {
+        float resolution = float(GRID_RESOLUTIONS[level]);
+        vec3 position = clamp(input_, 0.0, 1.0) * resolution;
+        ivec3 origin = min(ivec3(floor(position)), ivec3(GRID_RESOLUTIONS[level] - 1));
+        vec3 fraction = position - vec3(origin);
+
+        vec4 feature = vec4(0.0);
+        for (int corner = 0; corner < 8; corner++) {
+            ivec3 offset = ivec3(corner & 1, (corner >> 1) & 1, corner >> 2);
+            vec3 w = mix(1.0 - fraction, fraction, vec3(offset));
+            int row = gridIndex(level, origin + offset);
+            feature += w.x * w.y * w.z * readTexel{{ grid_channel }}(GRID_OFFSETS[level] + row);
+        }
+        for (int i = 0; i < 4; i++) {
+            features[level * 4 + i] = feature[i];
+        }
+    }
+}
+{% endif %}
+// Activation functions
+float relu(float x) {
+    return max(0.0, x);
+}
+
+float sigmoid(float x) {
+    return 1.0 / (1.0 + exp(-x));
+}
+{%- if early_exit %}
+
+// Early exit: {{ early_exit["tile_size"] }}x{{ early_exit["tile_size"] }} tiles flagged as solid by a coarse classifier skip the network
+const int TILE_SIZE = {{ early_exit["tile_size"] }};
+const float TILE_CONFIDENCE = {{ early_exit["confidence"] }};
+
+// Coarse classifier: probabilities that a tile is solid black and solid white
+vec2 tileClassifier(vec3 inputs) {
+    {%- for layer in tile_layer_info[:-1] %}
+    float tile_hidden{{ loop.index }}[{{ layer["output"] }}];
+    for (int i = 0; i < {{ layer["output"] }}; i++) {
+        float sum = 0.0;
+        for (int j = 0; j < {{ layer["input"] }}; j++) {
+            sum += {% if loop.index0 == 0 %}inputs[j]{% else %}tile_hidden{{ loop.index0 }}[j]{% endif %} * readWeight{{ layer["channel"] }}({{ layer["weight_offset"] }} + i * {{ layer["input"] }} + j);
+        }
+        sum += readWeight{{ layer["channel"] }}({{ layer["bias_offset"] }} + i);
+        tile_hidden{{ loop.index }}[i] = relu(sum);
+    }
+    {%- endfor %}
+    {%- set layer = tile_layer_info[-1] %}
+    vec2 solid;
+    for (int i = 0; i < 2; i++) {
+        float sum = 0.0;
+        for (int j = 0; j < {{ layer["input"] }}; j++) {
+            sum += {% if tile_layer_info|length == 1 %}inputs[j]{% else %}tile_hidden{{ tile_layer_info|length - 1 }}[j]{% endif %} * readWeight{{ layer["channel"] }}({{ layer["weight_offset"] }} + i * {{ layer["input"] }} + j);
+        }
+        sum += readWeight{{ layer["channel"] }}({{ layer["bias_offset"] }} + i);
+        solid[i] = sigmoid(sum);
+    }
+    return solid;
+}
+
+// Constant color of the tile of a video pixel, if it is classified as solid
+bool solidTile(float frame_norm, ivec2 pixel, out vec3 color) {
+    vec2 center = (vec2(pixel / TILE_SIZE) + 0.5) * float(TILE_SIZE);
+    vec2 solid = tileClassifier(vec3(frame_norm, center.x / float(VIDEO_WIDTH), center.y / float(VIDEO_HEIGHT)));
+    color = vec3(solid.y > solid.x ? 1.0 : 0.0);
+    return max(solid.x, solid.y) > TILE_CONFIDENCE;
+}
+{%- endif %}
+
+// Neural network forward pass
+vec3 neuralNetwork(vec3 input_) {
+    // Architecture: {{ hidden_sizes }} -> {{ layer_info[-1]["output"] }}
+    
+    {%- if encoding %}
+    float inputs[{{ layer_info[0]["input"] }}];
+    encode(input_, inputs);
+    {%- else %}
+    vec3 inputs = input_;
+    {%- endif %}
+    
+    {% for layer in layer_info[:-1] %}
+    // Layer {{ loop.index0 }}: [{{layer["input"]}}] -> [{{layer["output"]}}], Buffer {{ buffers[layer["channel"]] | upper }}
+    float hidden{{ loop.index }}[{{ layer["output"] }}];
+    for (int i = 0; i < {{ layer["output"] }}; i++) {
+        float sum = 0.0;
+        for (int j = 0; j < {{ layer["input"] }}; j++) {
+            sum += {% if loop.index0 == 0 %}inputs[j]{% else %}hidden{{ loop.index0 }}[j]{% endif %} * readWeight{{ layer["channel"] }}({{ layer["weight_offset"] }} + i * {{ layer["input"] }} + j);
+        }
+        sum += readWeight{{ layer["channel"] }}({{ layer["bias_offset"] }} + i);
+        hidden{{ loop.index }}[i] = relu(sum);
+    }
+    {% endfor %}
+    // Output layer: [{{ layer_info[-1]["input"] }}] -> [{{ layer_info[-1]["output"] }}], Buffer {{ buffers[layer_info[-1]["channel"]] | upper }}
+    vec3 color = vec3(0.0);
+    for (int i = 0; i < {{ layer_info[-1]["output"] }}; i++) {
+        float sum = 0.0;
+        for (int j = 0; j < {{ layer_info[-1]["input"] }}; j++) {
+            sum += hidden{{ layer_info|length - 1 }}[j] * readWeight{{ layer_info[-1]["channel"] }}({{ layer_info[-1]["weight_offset"] }} + i * {{ layer_info[-1]["input"] }} + j);
+        }
+        sum += readWeight{{ layer_info[-1]["channel"] }}({{ layer_info[-1]["bias_offset"] }} + i);
+        color[i] = sigmoid(sum);
+    }
+    {%- if layer_info[-1]["output"] == 1 %}
+    
+    // Grayscale
+    color = vec3(color.r);
+    {%- endif %}
+    
+    return color;
+}
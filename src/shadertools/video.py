@@ -40,15 +40,30 @@ from cv2 import (
     CAP_PROP_FRAME_COUNT,
     CAP_PROP_FRAME_HEIGHT,
     CAP_PROP_FRAME_WIDTH,
-    COLOR_RGB2GRAY,
+    COLOR_BGR2GRAY,
+    COLOR_BGR2RGB,
     VideoCapture,
     cvtColor,
 )
 from tqdm import tqdm
 
+# Pixel value columns of grayscale and color extractions
+GRAY_COLUMNS = ["pixel_value"]
+RGB_COLUMNS = ["red", "green", "blue"]
 
-def extract_pixels_from_capture(video_path: Path) -> pl.DataFrame:
-    """Extract all pixels from video using vectorized operations."""
+
+def pixel_columns(df: pl.DataFrame | pl.LazyFrame) -> list[str]:
+    """Pixel value columns of an extraction (one per channel)."""
+    return RGB_COLUMNS if RGB_COLUMNS[0] in df.collect_schema() else GRAY_COLUMNS
+
+
+def extract_pixels_from_capture(video_path: Path, color: bool = False) -> pl.DataFrame:
+    """Extract all pixels from video using vectorized operations.
+
+    Args:
+        video_path: Video file
+        color: Extract the red, green and blue channels instead of grayscale
+    """
     capture = VideoCapture(str(video_path))
     if not capture.isOpened():
         raise RuntimeError(f"Failed to open video file: {video_path}")
@@ -64,7 +79,8 @@ def extract_pixels_from_capture(video_path: Path) -> pl.DataFrame:
     frame_indices = np.empty(total_pixels, dtype=np.uint32)
     x_coords = np.empty(total_pixels, dtype=np.uint16)
     y_coords = np.empty(total_pixels, dtype=np.uint16)
-    pixel_values = np.empty(total_pixels, dtype=np.uint8)
+    columns = RGB_COLUMNS if color else GRAY_COLUMNS
+    pixel_values = np.empty((total_pixels, len(columns)), dtype=np.uint8)
 
     # Pre-compute coordinate grids (reused for each frame)
     y_grid, x_grid = np.mgrid[0:height, 0:width]
@@ -83,8 +99,9 @@ def extract_pixels_from_capture(video_path: Path) -> pl.DataFrame:
             pixel_values = pixel_values[:total_pixels]
             break
 
-        # Convert to grayscale and flatten
-        gray_frame = cvtColor(frame, COLOR_RGB2GRAY)
+        # Convert from OpenCV's BGR to grayscale or RGB, one row per pixel
+        converted = cvtColor(frame, COLOR_BGR2RGB if color else COLOR_BGR2GRAY)
+        values = converted.reshape(pixels_per_frame, len(columns))
 
         # Calculate offset for this frame
         offset = i * pixels_per_frame
@@ -94,7 +111,7 @@ def extract_pixels_from_capture(video_path: Path) -> pl.DataFrame:
         frame_indices[offset:end] = i
         x_coords[offset:end] = x_flat
         y_coords[offset:end] = y_flat
-        pixel_values[offset:end] = gray_frame.ravel()
+        pixel_values[offset:end] = values
 
     # Create DataFrame from numpy arrays (much faster)
     return pl.DataFrame(
@@ -102,6 +119,9 @@ def extract_pixels_from_capture(video_path: Path) -> pl.DataFrame:
             "frame": frame_indices,
             "x": x_coords,
             "y": y_coords,
-            "pixel_value": pixel_values,
+            **{
+                column: pixel_values[:, channel]
+                for channel, column in enumerate(columns)
+            },
         }
     )
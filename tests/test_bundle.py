@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from shadertools.bundle import ALIGNMENT, load_bundle, read_header, save_bundle
+
+
+def test_bundle_round_trip(tmp_path):
+    # Biases before weights: the order must be kept, not sorted
+    weights = {
+        "network.0.bias": np.arange(4, dtype=np.float32),
+        "network.0.weight": np.linspace(-1, 1, 12, dtype=np.float32).reshape(4, 3),
+        "network.2.weight": np.ones((1, 4), dtype=np.float64),
+        "scalar": np.float32(0.5),
+    }
+    metadata = {"hidden_sizes": [4], "encoding": None}
+    path = tmp_path / "model.stnn"
+    save_bundle(path, weights, metadata)
+
+    loaded, loaded_metadata = load_bundle(path)
+    assert loaded_metadata == metadata
+    assert list(loaded) == list(weights)
+    for name, value in weights.items():
+        assert loaded[name].shape == np.shape(value)
+        assert loaded[name].dtype == np.float32
+        np.testing.assert_array_equal(loaded[name], value)
+
+    header, data_offset = read_header(path)
+    assert data_offset % ALIGNMENT == 0
+    assert header["packing"]["total_weights"] == 21
+
+
+def test_bundle_rejects_other_files(tmp_path):
+    path = tmp_path / "model.stnn"
+    path.write_bytes(b"not a bundle" * 8)
+    with pytest.raises(ValueError):
+        read_header(path)
+
+
+def test_bundle_overwrite_mapped(tmp_path):
+    # Saving over a bundle that is still memory-mapped keeps the mapping valid
+    path = tmp_path / "model.stnn"
+    save_bundle(path, {"a": np.arange(4, dtype=np.float32)}, {})
+    mapped = load_bundle(path)[0]["a"]
+
+    save_bundle(path, {"a": mapped * 2}, {"scaled": True})
+    np.testing.assert_array_equal(mapped, np.arange(4))
+
+    loaded, metadata = load_bundle(path)
+    np.testing.assert_array_equal(loaded["a"], np.arange(4) * 2)
+    assert metadata == {"scaled": True}
+    assert [p.name for p in tmp_path.iterdir()] == ["model.stnn"]
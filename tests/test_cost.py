@@ -0,0 +1,97 @@
+import pytest
+
+from shadertools.cost import (
+    CostBudgetExceeded,
+    analyze_shader,
+    check_budget,
+    estimate_frame_cost,
+)
+
+SHADER = """
+const int SIZE = 4;
+const int INPUTS = SIZE * 2 - 1;
+
+float readWeight(int index) {
+    // Index arithmetic and the denormalization are not multiply-adds
+    vec4 pixel = texelFetch(iChannel0, ivec2(index % SIZE, index / SIZE), 0);
+    return (pixel * 2.0 - 1.0)[index % 4];
+}
+
+void mainImage(out vec4 fragColor, in vec2 fragCoord) {
+    float inputs[INPUTS];
+    float sum = 0.0;
+    for (int i = 0; i < 3; i++) {
+        for (int j = 0; j < INPUTS; j++) {
+            sum += inputs[j] * readWeight(i * INPUTS + j);
+        }
+    }
+    fragColor = vec4(1.0 / (1.0 + exp(-sum)));
+}
+"""
+
+
+def test_analyze_shader():
+    assert analyze_shader(SHADER) == {
+        "texel_fetches": 21,
+        "multiply_adds": 21,
+        "transcendentals": 1,
+        "loop_iterations": 24,
+    }
+
+
+def test_analyze_shader_unknown_bounds():
+    # Loops without constant bounds count as one iteration
+    shader = """
+    void mainImage(out vec4 fragColor, in vec2 fragCoord) {
+        float sum = 0.0;
+        for (int i = 0; i < int(iTime); i++) {
+            sum += sum * 0.5;
+        }
+        fragColor = vec4(sum);
+    }
+    """
+    assert analyze_shader(shader)["loop_iterations"] == 1
+    assert analyze_shader(shader)["multiply_adds"] == 1
+
+
+def test_analyze_shader_rejects_power():
+    shader = """
+    void mainImage(out vec4 fragColor, in vec2 fragCoord) {
+        for (int i = 0; i < 2**2**64; i++) {
+            fragColor += texelFetch(iChannel0, ivec2(i, 0), 0);
+        }
+    }
+    """
+    assert analyze_shader(shader)["texel_fetches"] == 1
+
+
+def test_check_budget():
+    report = estimate_frame_cost({"image": (SHADER, 100)})
+    assert report["total"]["per_frame"]["texel_fetches"] == 2100
+
+    check_budget(report, {"texel_fetches": 2100})
+    with pytest.raises(CostBudgetExceeded):
+        check_budget(report, {"multiply_adds": 2000})
+
+
+def test_estimate_frame_cost_early_returns():
+    shader = """
+    const int SIZE = 4;
+
+    void mainImage(out vec4 fragColor, in vec2 fragCoord) {
+        if (int(fragCoord.x) >= SIZE) {
+            fragColor = vec4(0.0);
+            return;
+        }
+        for (int i = 0; i < SIZE; i++) {
+            fragColor += texelFetch(iChannel0, ivec2(i, 0), 0);
+        }
+    }
+    """
+    assert analyze_shader(shader, early_return=True)["texel_fetches"] == 0
+
+    # 4 of 10 fragments run the loop, the others return before it
+    report = estimate_frame_cost({"buffer": (shader, 10)}, {"buffer": 6})
+    assert report["buffer"]["fragments"] == 10
+    assert report["total"]["per_frame"]["texel_fetches"] == 16
+    assert report["total"]["per_frame"]["loop_iterations"] == 16
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+import torch
+
+from shadertools.nn import HashGridEncoding, fake_quantize
+from shadertools.shader import quantize_weights
+
+
+def grid_index(resolution, table_size, vertices):
+    """numpy port of the GLSL gridIndex, in 32-bit uint arithmetic."""
+    resolution += 1
+    if resolution**3 <= table_size:
+        return vertices[:, 0] + resolution * (
+            vertices[:, 1] + resolution * vertices[:, 2]
+        )
+    v = vertices.astype(np.uint32)
+    hashed = (
+        v[:, 0] ^ (v[:, 1] * np.uint32(2654435761)) ^ (v[:, 2] * np.uint32(805459861))
+    )
+    return (hashed % np.uint32(table_size)).astype(np.int64)
+
+
+@pytest.mark.parametrize("quantization", ["fp16", "int8"])
+def test_fake_quantize_matches_shader_storage(quantization):
+    # Training must see exactly the weights the shaders decode
+    rng = np.random.default_rng(0)
+    weights = {
+        f"tensor.{index}": (rng.standard_normal(size) * spread).astype(np.float32)
+        for index, (size, spread) in enumerate(
+            [(64, 1.0), (300, 0.01), (17, 40.0), (1000, 3.0), (5, 0.0)]
+        )
+    }
+    values, scales = quantize_weights(weights, quantization)
+    values = np.asarray(values)
+
+    offset = 0
+    for index, param in enumerate(weights.values()):
+        stored = values[offset : offset + param.size]
+        offset += param.size
+        if quantization == "int8":
+            decoded = stored.astype(np.float32) * scales[index]
+        else:
+            decoded = stored.astype(np.float32)
+
+        expected = fake_quantize(torch.from_numpy(param), quantization).numpy()
+        np.testing.assert_array_equal(decoded, expected)
+
+
+def test_grid_index_matches_vertex_index():
+    # A dense 5³ level and a hashed 65³ level
+    encoding = HashGridEncoding(levels=2, base_resolution=4, max_resolution=64)
+    assert encoding.resolutions == [4, 64]
+    assert encoding.table_sizes == [125, 128]
+
+    for level, resolution in enumerate(encoding.resolutions):
+        axis = np.arange(resolution + 1)
+        vertices = np.stack(np.meshgrid(axis, axis, axis), axis=-1).reshape(-1, 3)
+        rows = encoding.vertex_index(level, torch.from_numpy(vertices)).numpy()
+
+        np.testing.assert_array_equal(
+            grid_index(resolution, encoding.table_sizes[level], vertices), rows
+        )
+        assert rows.min() >= 0 and rows.max() < encoding.table_sizes[level]
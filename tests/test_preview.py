@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from shadertools.preview import upscale
+
+
+@pytest.mark.parametrize("upscale_filter", ["bilinear", "edge"])
+def test_upscale_keeps_smooth_gradients(upscale_filter):
+    # Anti-aliased grays and color gradients are interpolated as is
+    low = np.linspace(0.3, 0.6, 8)[None, :, None] * np.array([1.0, 0.5, 0.2])
+    low = np.repeat(low, 4, axis=0)
+    bilinear = upscale(low, 16, 8, "bilinear")
+    image = upscale(low, 16, 8, upscale_filter)
+
+    np.testing.assert_allclose(image, bilinear, atol=0.01)
+    assert 0.3 - 1e-6 <= image[..., 0].min() and image[..., 0].max() <= 0.6 + 1e-6
+
+
+def test_upscale_edge_keeps_edges_sharp():
+    # Black/white step between columns 3 and 4
+    low = np.zeros((4, 8, 1))
+    low[:, 4:] = 1.0
+    bilinear = upscale(low, 32, 16, "bilinear")
+    edge = upscale(low, 32, 16, "edge")
+
+    gray = (bilinear > 0.05) & (bilinear < 0.95)
+    assert gray.any()
+    assert ((edge > 0.05) & (edge < 0.95)).sum() < gray.sum() / 4
+    # The sides of the step are unchanged
+    np.testing.assert_allclose(edge[:, :8], 0.0, atol=1e-6)
+    np.testing.assert_allclose(edge[:, -8:], 1.0, atol=1e-6)
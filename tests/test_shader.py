@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from shadertools.shader import generate_weight_buffers, shard_weights, weight_units
+
+
+def layer_weights(sizes, levels=0):
+    """Weights named like TinyVideoNet's, with optional grid tables."""
+    weights = {}
+    for level in range(levels):
+        weights[f"encoding.embeddings.{level}"] = np.zeros((32, 4))
+    for index, (inputs, outputs) in enumerate(zip(sizes, sizes[1:])):
+        weights[f"network.{2 * index}.weight"] = np.zeros((outputs, inputs))
+        weights[f"network.{2 * index}.bias"] = np.zeros(outputs)
+    return weights
+
+
+def test_weight_units():
+    weights = layer_weights([3, 8, 1], levels=2)
+    assert weight_units(weights) == [
+        ["encoding.embeddings.0", "encoding.embeddings.1"],
+        ["network.0.weight", "network.0.bias"],
+        ["network.2.weight", "network.2.bias"],
+    ]
+
+
+@pytest.mark.parametrize("num_shards", [1, 2, 3, 4])
+def test_shard_weights_keeps_units(num_shards):
+    weights = layer_weights([3, 32, 64, 64, 32, 1], levels=4)
+    shards = shard_weights(weights, num_shards)
+
+    assert 1 <= len(shards) <= num_shards
+    # Contiguous, in order, every tensor once
+    assert [key for shard in shards for key in shard] == list(weights)
+    # A unit (layer or encoding) never spans two shards
+    shard_of = {key: i for i, shard in enumerate(shards) for key in shard}
+    for unit in weight_units(weights):
+        assert len({shard_of[key] for key in unit}) == 1
+
+
+def test_shard_weights_minimizes_largest_shard():
+    # Layers of 32, 576, 4160 and 65 values
+    weights = layer_weights([3, 8, 64, 64, 1])
+    sizes = [
+        sum(shard[key].size for key in shard) for shard in shard_weights(weights, 4)
+    ]
+    assert max(sizes) == 64 * 64 + 64
+    assert len(shard_weights(weights, 1)) == 1
+
+
+def test_shard_weights_large_first_unit():
+    # The first unit is larger than any run of the others
+    weights = {
+        "encoding.embeddings.0": np.zeros(100),
+        "network.0.weight": np.zeros(10),
+        "network.2.weight": np.zeros(10),
+    }
+    for num_shards in range(2, 5):
+        shards = shard_weights(weights, num_shards)
+        assert all(shards)
+        assert list(shards[0]) == ["encoding.embeddings.0"]
+    assert [list(shard) for shard in shard_weights(weights, 2)] == [
+        ["encoding.embeddings.0"],
+        ["network.0.weight", "network.2.weight"],
+    ]
+
+
+def test_generate_weight_buffers_unit_too_large():
+    # Grid table and layer each fill most of a buffer
+    weights = layer_weights([3, 64, 1], levels=1)
+    weights["encoding.embeddings.0"] = np.full((1000, 4), 0.123456)
+    weights["network.2.weight"] = np.full((64, 64), 0.123456)
+    buffers, layout, tex_sizes = generate_weight_buffers(weights, {}, max_buffers=4)
+    assert len(buffers) == 2
+    assert all(tex_sizes)
+    assert layout["encoding.embeddings.0"]["channel"] == 0
+    assert layout["network.2.weight"]["channel"] == 1
+
+    weights["network.0.weight"] = np.full((128, 128), 0.123456)
+    with pytest.raises(ValueError):
+        generate_weight_buffers(weights, {}, max_buffers=4)